@@ -0,0 +1,48 @@
+"""
+    Отчет по операторам и типам документов: цикл по объектам
+    Patient против PatientCollection.to_arrays().
+
+    python -m benchmarks.bench_analytics --rows 200000
+"""
+import argparse
+import os
+import tempfile
+import time
+from collections import Counter
+
+from homework.patient import PatientCollection
+from benchmarks.bench_iteration import write_table
+
+
+def report_objects(path):
+    operators, documents = Counter(), Counter()
+    for patient in PatientCollection(path, trusted=True):
+        operators[int(patient.phone[1:4])] += 1
+        documents[patient.document_type] += 1
+    return dict(operators), dict(documents)
+
+
+def report_arrays(path):
+    arrays = PatientCollection(path).to_arrays()
+    return arrays.counts_by_operator(), arrays.counts_by_document_type()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.csv")
+        write_table(path, args.rows)
+        results = []
+        for name, report in (("objects", report_objects), ("arrays", report_arrays)):
+            start = time.perf_counter()
+            results.append(report(path))
+            elapsed = time.perf_counter() - start
+            print(f"{name:>10}: {args.rows / elapsed:12.0f} rows/sec ({elapsed:.3f}s)")
+        assert results[0] == results[1]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+    Размер файла и скорость загрузки: csv (строгий и trusted
+    режим) против бинарного хранилища.
+
+    python -m benchmarks.bench_binary --rows 200000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from homework.patient import PatientCollection, BinaryPatientCollection
+from homework.storage import csv_to_binary
+from benchmarks.bench_lookup import write_table
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, binary_path = os.path.join(tmp, "table.csv"), os.path.join(tmp, "table.bin")
+        write_table(csv_path, args.rows)
+        csv_to_binary(csv_path, binary_path)
+        print(f"{'csv size':>14}: {os.path.getsize(csv_path) / args.rows:8.1f} bytes/patient")
+        print(f"{'binary size':>14}: {os.path.getsize(binary_path) / args.rows:8.1f} bytes/patient")
+        for name, collection in (("csv trusted", PatientCollection(csv_path, trusted=True)),
+                                 ("binary", BinaryPatientCollection(binary_path))):
+            start = time.perf_counter()
+            count = sum(1 for _ in collection)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>14}: {count / elapsed:12.0f} rows/sec ({elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
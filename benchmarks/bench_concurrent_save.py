@@ -0,0 +1,49 @@
+"""
+    Нагрузочный тест одновременной записи из нескольких процессов:
+    saves/sec в зависимости от числа писателей, с проверкой,
+    что все строки дошли целыми.
+
+    python -m benchmarks.bench_concurrent_save --rows 20000 --writers 1 2 4 8
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from homework.config import PASSPORT_TYPE
+from homework.patient import Patient
+from homework.storage import append_rows
+
+LINE = Patient("Кондрат", "Коловрат", "1978-01-31", "89160000000", PASSPORT_TYPE, "0228 000000").csv_line()
+
+
+def writer(path, rows):
+    for _ in range(rows):
+        append_rows(path, LINE)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000, help="rows per writer")
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for writers in args.writers:
+            path = os.path.join(tmp, f"table_{writers}.csv")
+            processes = [multiprocessing.Process(target=writer, args=(path, args.rows)) for _ in range(writers)]
+            start = time.perf_counter()
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            elapsed = time.perf_counter() - start
+            with open(path, encoding="utf-8") as table:
+                assert all(line == LINE for line in table), "Rows were interleaved"
+            total = writers * args.rows
+            print(f"{writers:>3} writers: {total / elapsed:10.0f} saves/sec")
+
+
+if __name__ == "__main__":
+    main()
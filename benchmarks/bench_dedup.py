@@ -0,0 +1,69 @@
+"""
+    Поиск дублей: время и пик памяти find_duplicates на растущих
+    файлах против попарного сравнения на маленьком.
+
+    python -m benchmarks.bench_dedup --rows 100000 200000 400000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from homework.config import PASSPORT_TYPE
+from homework.patient import PatientCollection, Patient
+
+NAMES = ("Кондрат", "Евпатий", "Ада", "Миртл", "Гарри", "Рон", "Билл", "Фёдор")
+
+
+def write_table(path, rows, duplicate_every=50):
+    template = Patient("Кондрат", "Коловрат", "1978-01-31", "89160000000", PASSPORT_TYPE, "0228 000000")
+    line = template.csv_line()
+    with open(path, "w", encoding="utf-8") as table:
+        for i in range(rows):
+            number = i - 1 if i % duplicate_every == 0 and i else i
+            table.write(line.replace("89160000000", f"8916{number:07}")
+                        .replace("0228000000", f"{i:010}")
+                        .replace("Коловрат", f"Коловрат{i}")
+                        .replace("Кондрат", NAMES[i % len(NAMES)])
+                        .replace("1978-01-31", f"{1900 + i % 120}-01-{1 + i % 28:02}")
+                        .replace(template.key, f"{i:032x}"))
+
+
+def pairwise(path):
+    lines = [line.split(",") for line in open(path, encoding="utf-8")]
+    found = 0
+    for i, first in enumerate(lines):
+        for second in lines[i + 1:]:
+            if first[3] == second[3] or first[5] == second[5] or first[1:3] == second[1:3]:
+                found += 1
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 200000, 400000])
+    parser.add_argument("--pairwise", type=int, default=3000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.csv")
+        write_table(path, args.pairwise)
+        start = time.perf_counter()
+        pairwise(path)
+        print(f"{'pairwise':>10} {args.pairwise:>9} rows: {time.perf_counter() - start:8.3f} s")
+
+        for rows in args.rows:
+            write_table(path, rows)
+            tracemalloc.start()
+            start = time.perf_counter()
+            clusters = sum(1 for _ in PatientCollection(path, trusted=True).find_duplicates())
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{'blocking':>10} {rows:>9} rows: {elapsed:8.3f} s, "
+                  f"{clusters} clusters, peak {peak / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+    Проверка номеров документов при растущем реестре типов:
+    время на номер не должно зависеть от числа типов.
+
+    python -m benchmarks.bench_documents --rows 200000 --types 3 50 250
+"""
+import argparse
+import time
+
+from homework.config import PASSPORT_TYPE
+from homework.documents import DocumentTypeRegistry
+
+
+def measure(name, function, rows):
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"{name:>24}: {elapsed:8.3f} s, {elapsed / rows * 1e9:8.1f} ns/document")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--types", type=int, nargs="+", default=[3, 50, 250])
+    args = parser.parse_args()
+
+    documents = [f"0228 {i % 1000000:06}" for i in range(args.rows)]
+    types = [PASSPORT_TYPE, "Паспорт", "ПАСПОРТ"] * (args.rows // 3 + 1)
+    for count in args.types:
+        registry = DocumentTypeRegistry()
+        registry.register(PASSPORT_TYPE, 10)
+        for i in range(count - 1):
+            registry.register(f"документ {i}", 10 if i % 2 else None, pattern=r"[0-9]+")
+        normalize = registry.normalize
+        measure(f"{count} types", lambda: [normalize(t, d) for t, d in zip(types, documents)], args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+    Лента изменений: новые строки через follow(from_offset=...)
+    против полного перечитывания файла, и задержка от записи до
+    получения строки для inotify и опроса.
+
+    python -m benchmarks.bench_follow --rows 200000 --new 100
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_lookup import write_table
+from homework.config import PASSPORT_TYPE
+from homework.patient import PatientCollection, Patient
+
+
+def wakeup_latency(path, inotify, samples=20):
+    collection = PatientCollection(path, trusted=True)
+    follower = collection.follow(from_offset=os.path.getsize(path), timeout=5, inotify=inotify)
+    patient = Patient("Ада", "Лавлейс", "1978-01-21", "89160000002", PASSPORT_TYPE, "0228000002")
+    written = []
+
+    def writer():
+        for _ in range(samples):
+            time.sleep(0.05)
+            written.append(time.perf_counter())
+            collection.append([patient])
+    thread = threading.Thread(target=writer)
+    thread.start()
+    delays = []
+    for _ in follower:
+        delays.append(time.perf_counter() - written[len(delays)])
+        if len(delays) == samples:
+            follower.stop()
+    thread.join()
+    return sorted(delays)[len(delays) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--new", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.csv")
+        write_table(path, args.rows)
+        checkpoint = os.path.getsize(path)
+        collection = PatientCollection(path, trusted=True)
+        patient = Patient("Ада", "Лавлейс", "1978-01-21", "89160000002", PASSPORT_TYPE, "0228000002")
+        collection.append([patient] * args.new)
+
+        start = time.perf_counter()
+        sum(1 for _ in collection)
+        print(f"{'rescan':>10}: {(time.perf_counter() - start) * 1000:10.3f} ms")
+
+        start = time.perf_counter()
+        found = sum(1 for _ in collection.follow(from_offset=checkpoint, timeout=0))
+        print(f"{'follow':>10}: {(time.perf_counter() - start) * 1000:10.3f} ms, {found} new rows")
+
+        for name, inotify in (("inotify", True), ("polling", False)):
+            print(f"{name:>10}: median wakeup {wakeup_latency(path, inotify) * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
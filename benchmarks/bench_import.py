@@ -0,0 +1,41 @@
+"""
+    Масштабирование PatientCollection.import_csv по числу процессов.
+
+    python -m benchmarks.bench_import --rows 200000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from homework.config import PASSPORT_TYPE
+from homework.patient import PatientCollection
+
+
+def write_source(path, rows):
+    with open(path, "w", encoding="utf-8") as source:
+        for i in range(rows):
+            source.write(f"Кондрат,Коловрат,1978-01-31,+7 916 {i % 10000000:07},{PASSPORT_TYPE},0228 {i % 1000000:06}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.csv")
+        write_source(source, args.rows)
+        base = None
+        for workers in args.workers:
+            destination = os.path.join(tmp, f"table_{workers}.csv")
+            start = time.perf_counter()
+            PatientCollection(destination).import_csv(source, workers=workers)
+            elapsed = time.perf_counter() - start
+            base = base or elapsed
+            print(f"{workers:>3} workers: {args.rows / elapsed:10.0f} rows/sec, speedup {base / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+    Скорость чтения строк csv: прежний readline + tell + fstat
+    на каждую строку против блочного чтения CollectionIterator.
+    Patient не создаются, замеряется только чтение.
+
+    python -m benchmarks.bench_iteration --rows 2000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from homework.patient import CollectionIterator, Patient
+from homework.config import PASSPORT_TYPE
+
+LINE = Patient("Кондрат", "Коловрат", "1978-01-31", "89160000000", PASSPORT_TYPE, "0228 000000").csv_line()
+
+
+def write_table(path, rows):
+    with open(path, "w", encoding="utf-8") as table:
+        for _ in range(rows // 10000):
+            table.write(LINE * 10000)
+        table.write(LINE * (rows % 10000))
+
+
+def read_readline(path):
+    count = 0
+    with open(path, "r", encoding="utf-8") as table:
+        while table.tell() != os.fstat(table.fileno()).st_size:
+            table.readline()
+            count += 1
+    return count
+
+
+def read_chunked(path):
+    count = 0
+    iterator = CollectionIterator(path)
+    while iterator.next_line() is not None:
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.csv")
+        write_table(path, args.rows)
+        for name, reader in (("readline", read_readline), ("chunked", read_chunked)):
+            start = time.perf_counter()
+            count = reader(path)
+            elapsed = time.perf_counter() - start
+            assert count == args.rows
+            print(f"{name:>10}: {count / elapsed:12.0f} rows/sec ({elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
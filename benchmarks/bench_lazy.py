@@ -0,0 +1,40 @@
+"""
+    Отбор пациентов по типу документа: полная загрузка против
+    LazyPatient и filter с проверкой по тексту строки.
+
+    python -m benchmarks.bench_lazy --rows 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_lookup import write_table
+from homework.config import PASSPORT_TYPE
+from homework.patient import PatientCollection
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.csv")
+        write_table(path, args.rows)
+        cases = {
+            "eager": lambda: [p for p in PatientCollection(path) if p.document_type == PASSPORT_TYPE],
+            "lazy": lambda: [p for p in PatientCollection(path, lazy=True)
+                             if p.document_type == PASSPORT_TYPE],
+            "filter": lambda: list(PatientCollection(path, lazy=True).filter(document_type=PASSPORT_TYPE)),
+            "filter none": lambda: list(PatientCollection(path).filter(phone="89169999999")),
+        }
+        for name, case in cases.items():
+            start = time.perf_counter()
+            found = len(case())
+            elapsed = time.perf_counter() - start
+            print(f"{name:>12}: {elapsed:8.3f} s, {args.rows / elapsed:12.0f} rows/s, found {found}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+    Загрузка пациентов из csv: строгий режим с проверкой всех
+    полей против PatientCollection(path, trusted=True).
+
+    python -m benchmarks.bench_load --rows 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from homework.patient import PatientCollection
+from benchmarks.bench_iteration import write_table
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.csv")
+        write_table(path, args.rows)
+        for name, trusted in (("strict", False), ("trusted", True)):
+            start = time.perf_counter()
+            count = sum(1 for _ in PatientCollection(path, trusted=trusted))
+            elapsed = time.perf_counter() - start
+            print(f"{name:>10}: {count / elapsed:12.0f} rows/sec ({elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
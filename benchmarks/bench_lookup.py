@@ -0,0 +1,53 @@
+"""
+    Поиск пациента по телефону: полный проход по коллекции
+    против find_by_phone через FieldIndex.
+
+    python -m benchmarks.bench_lookup --rows 200000 --lookups 100
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from homework.config import PASSPORT_TYPE
+from homework.patient import PatientCollection, Patient
+
+
+def write_table(path, rows):
+    with open(path, "w", encoding="utf-8") as table:
+        template = Patient("Кондрат", "Коловрат", "1978-01-31", "89160000000", PASSPORT_TYPE, "0228 000000")
+        line = template.csv_line()
+        for i in range(rows):
+            table.write(line.replace("89160000000", f"8916{i:07}").replace("0228000000", f"{i:010}"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--lookups", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.csv")
+        write_table(path, args.rows)
+        phones = [f"8916{i * (args.rows // args.lookups):07}" for i in range(args.lookups)]
+        collection = PatientCollection(path, trusted=True)
+
+        start = time.perf_counter()
+        for phone in phones[:5]:
+            [patient for patient in collection if patient.phone == phone]
+        scan = (time.perf_counter() - start) / 5
+        print(f"{'scan':>12}: {scan * 1000:10.3f} ms/lookup")
+
+        start = time.perf_counter()
+        collection.find_by_phone(phones[0])
+        print(f"{'build index':>12}: {(time.perf_counter() - start) * 1000:10.3f} ms")
+
+        start = time.perf_counter()
+        for phone in phones:
+            collection.find_by_phone(phone)
+        print(f"{'index':>12}: {(time.perf_counter() - start) / len(phones) * 1000:10.3f} ms/lookup")
+
+
+if __name__ == "__main__":
+    main()
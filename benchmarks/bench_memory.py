@@ -0,0 +1,47 @@
+"""
+    Память под пациентов: список объектов Patient против
+    столбцового PatientTable (замер через tracemalloc).
+
+    python -m benchmarks.bench_memory --rows 100000
+"""
+import argparse
+import random
+import tracemalloc
+
+from homework.config import PASSPORT_TYPE, DRIVER_LICENSE_TYPE
+from homework.patient import Patient
+from homework.table import PatientTable
+
+FIRST_NAMES = ["Кондрат", "Евпатий", "Ада", "Миртл", "Евлампия", "Кузя", "Гарри", "Рон"]
+LAST_NAMES = ["Рюрик", "Коловрат", "Лавлейс", "Плакса", "Фамилия", "Кузьмин", "Поттер", "Уизли"]
+
+
+def make_rows(rows):
+    generator = random.Random(0)
+    for i in range(rows):
+        yield (generator.choice(FIRST_NAMES), generator.choice(LAST_NAMES),
+               f"{generator.randint(1930, 2020)}-{generator.randint(1, 12):02}-{generator.randint(1, 28):02}",
+               f"8916{i % 10000000:07}", generator.choice((PASSPORT_TYPE, DRIVER_LICENSE_TYPE)), f"{i:010}")
+
+
+def measure(name, build, rows):
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:>10}: {current / rows:8.1f} bytes/patient, peak {peak / 2 ** 20:.1f} MiB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = list(make_rows(args.rows))
+    measure("Patient", lambda: [Patient(*row) for row in rows], args.rows)
+    measure("Table", lambda: PatientTable(rows), args.rows)
+
+
+if __name__ == "__main__":
+    main()
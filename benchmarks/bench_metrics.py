@@ -0,0 +1,53 @@
+"""
+    Цена замеров homework.metrics: строгая загрузка коллекции
+    и создание пациентов с выключенными и включенными метриками.
+
+    python -m benchmarks.bench_metrics --rows 20000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_lookup import write_table
+from homework import metrics
+from homework.config import PASSPORT_TYPE
+from homework.patient import PatientCollection, Patient
+
+
+def measure(rows, path):
+    start = time.perf_counter()
+    for patient in PatientCollection(path):
+        pass
+    load = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(rows // 10):
+        Patient("Кондрат", "Коловрат", "1978-01-31", f"8916{i:07}", PASSPORT_TYPE, f"{i:010}")
+    create = time.perf_counter() - start
+    return load, create
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.csv")
+        write_table(path, args.rows)
+        # прогоны чередуются, от шума машины спасает минимум
+        off, on = [], []
+        for _ in range(args.repeat):
+            off.append(measure(args.rows, path))
+            metrics.enable()
+            on.append(measure(args.rows, path))
+            metrics.disable()
+        for i, name in enumerate(("load", "create")):
+            before, after = min(run[i] for run in off), min(run[i] for run in on)
+            print(f"{name:>8}: off {before:8.3f} s, on {after:8.3f} s, "
+                  f"overhead {(after / before - 1) * 100:6.1f} %")
+        print(f"rows/s while loading: {metrics.snapshot()['collection_rows_per_second']:.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+    Нормализация телефонов и номеров документов: прежняя
+    реализация на модуле regex против homework.normalizer.
+
+    python -m benchmarks.bench_normalizer --rows 200000
+"""
+import argparse
+import time
+
+import regex as re
+
+from homework.normalizer import OPERATORS_CODE, INAPROPRIATE_SYMBOLS, normalize_phones, normalize_document_id
+
+PHONES = ["+7-916-000-00-00", "8(903)111-22-33", "89160000000", "+7 999 123 45 67", "8-800-000-00-00"]
+DOCUMENTS = ["0228 000000", "00/000-0000", "0000-000000", "0 0 0 0 0 0 0 0 0 0"]
+
+
+def old_check_phone(number):
+    parsed_num = re.findall(r"\d+", number)
+    res = "8"
+    res += ''.join(parsed_num)[1:]
+    if len(res) != 11:
+        return None, False
+    if int(res[1:4]) not in OPERATORS_CODE:
+        return None, False
+    if re.search(INAPROPRIATE_SYMBOLS, number) is not None:
+        return None, False
+    return res, True
+
+
+def old_check_id(number, fix_size):
+    parsed_num = re.findall(r"\d+", number)
+    res = ''.join(parsed_num)
+    if len(res) != fix_size:
+        return None, False
+    if re.search(INAPROPRIATE_SYMBOLS, number) is not None:
+        return None, False
+    return res, True
+
+
+def measure(name, func, rows):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:>16}: {rows / elapsed:12.0f} values/sec ({elapsed:.3f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    phones = (PHONES * (args.rows // len(PHONES) + 1))[:args.rows]
+    documents = (DOCUMENTS * (args.rows // len(DOCUMENTS) + 1))[:args.rows]
+    measure("old phones", lambda: [old_check_phone(phone) for phone in phones], args.rows)
+    measure("new phones", lambda: normalize_phones(phones), args.rows)
+    measure("old documents", lambda: [old_check_id(doc, 10) for doc in documents], args.rows)
+    measure("new documents", lambda: [normalize_document_id(doc, 10) for doc in documents], args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+    Подсчет пациентов по операторам: последовательный проход по
+    коллекции против parallel_reduce на разном числе процессов.
+
+    python -m benchmarks.bench_parallel_scan --rows 200000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.generator import PatientGenerator
+from homework.patient import PatientCollection, Patient
+
+
+def count_operator(counter, patient):
+    operator = patient.phone[1:4]
+    counter[operator] = counter.get(operator, 0) + 1
+    return counter
+
+
+def merge_counts(counter, part):
+    for operator, count in part.items():
+        counter[operator] = counter.get(operator, 0) + count
+    return counter
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--strict", action="store_true", help="проверять строки дескрипторами")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.csv")
+        PatientCollection(path).save_many(Patient(*params) for params in PatientGenerator(0).patients(args.rows))
+        collection = PatientCollection(path, trusted=not args.strict)
+        print(f"cpu count: {os.cpu_count()}")
+
+        start = time.perf_counter()
+        expected = {}
+        for patient in collection:
+            count_operator(expected, patient)
+        serial = time.perf_counter() - start
+        print(f"{'serial':>10}: {serial:8.3f} s")
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            counts = collection.parallel_reduce(count_operator, merge_counts, {}, workers)
+            elapsed = time.perf_counter() - start
+            assert counts == expected
+            print(f"{workers:>3} workers: {elapsed:8.3f} s, speedup {serial / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
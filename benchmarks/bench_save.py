@@ -0,0 +1,53 @@
+"""
+    Сравнение построчного Patient.save с пакетной записью
+    через PatientCollection.save_many.
+
+    python -m benchmarks.bench_save --rows 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from homework.config import CSV_PATH, PASSPORT_TYPE
+from homework.patient import Patient, PatientCollection
+
+
+def make_patients(rows):
+    patient = Patient("Кондрат", "Коловрат", "1978-01-31", "89160000000", PASSPORT_TYPE, "0228 000000")
+    return [patient] * rows
+
+
+def bench_save(patients):
+    start = time.perf_counter()
+    for patient in patients:
+        patient.save()
+    return time.perf_counter() - start
+
+
+def bench_save_many(patients, batch_size):
+    start = time.perf_counter()
+    PatientCollection(CSV_PATH).save_many(patients, batch_size)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    patients = make_patients(args.rows)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            for name, elapsed in (("save", bench_save(patients)),
+                                  ("save_many", bench_save_many(patients, args.batch_size))):
+                print(f"{name:>10}: {args.rows / elapsed:12.0f} rows/sec ({elapsed:.3f}s)")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+    Sqlite против csv: пакетная вставка, полный проход и
+    поиск по телефону на разных объемах.
+
+    python -m benchmarks.bench_sqlite --rows 10000 1000000 10000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from homework.config import PASSPORT_TYPE
+from homework.patient import Patient, PatientCollection
+from homework.sqlite import SqlitePatientCollection
+
+
+def make_patients(rows):
+    template = Patient("Кондрат", "Коловрат", "1978-01-31", "89160000000", PASSPORT_TYPE, "0228 000000")
+    for i in range(rows):
+        yield Patient.restore(template.first_name, template.last_name, template.birth_date,
+                              f"8916{i % 10000000:07}", PASSPORT_TYPE, f"{i:010}")
+
+
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000])
+    parser.add_argument("--lookups", type=int, default=100)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_collection = PatientCollection(os.path.join(tmp, "table.csv"), trusted=True)
+            sqlite_collection = SqlitePatientCollection(os.path.join(tmp, "patients.db"))
+            phones = [f"8916{i * max(rows // args.lookups, 1) % 10000000:07}" for i in range(args.lookups)]
+            print(f"--- {rows} rows")
+            for name, collection in (("csv", csv_collection), ("sqlite", sqlite_collection)):
+                _, insert = measure(lambda: collection.save_many(make_patients(rows), 10000))
+                count, scan = measure(lambda: sum(1 for _ in collection))
+                collection.find_by_phone(phones[0])  # построение индекса csv не входит в замер
+                _, lookup = measure(lambda: [collection.find_by_phone(phone) for phone in phones])
+                print(f"{name:>7}: insert {rows / insert:10.0f} rows/sec, scan {count / scan:10.0f} rows/sec, "
+                      f"lookup {lookup / len(phones) * 1000:8.3f} ms")
+            sqlite_collection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+    Время импорта модулей по -X importtime: медиана нескольких
+    запусков чистого интерпретатора, самые тяжелые зависимости и
+    проверка бюджета. При превышении бюджета скрипт завершается
+    с кодом 1, его можно ставить в CI.
+
+    python -m benchmarks.bench_startup --runs 5 --budget-ms 120
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULES = ("homework.patient", "homework.logger")
+
+
+def import_times(module):
+    """Суммарное время импорта в микросекундах по каждому модулю"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=120)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        runs = [import_times(module) for _ in range(args.runs)]
+        total = statistics.median(run[module] for run in runs) / 1000
+        status = "ok" if total <= args.budget_ms else "OVER BUDGET"
+        failed |= total > args.budget_ms
+        print(f"{module:>18}: {total:8.1f} ms (budget {args.budget_ms:.0f} ms) {status}")
+        heaviest = sorted(((statistics.median(run.get(name, 0) for run in runs), name)
+                           for name in runs[0] if name != module and not name.startswith(module + ".")),
+                          reverse=True)
+        for cumulative, name in heaviest[:args.top]:
+            print(f"{'':>18}  {name:<24} {cumulative / 1000:8.1f} ms")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
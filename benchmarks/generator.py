@@ -0,0 +1,123 @@
+"""
+    Воспроизводимый генератор пациентов для бенчмарков.
+
+    Корректные строки записаны в разных форматах, которые принимает
+    Patient: телефоны с кодами из OPERATORS_CODE и разделителями,
+    номера документов по длине форматов из homework/config.py, даты
+    в ISO и через точку. В некорректной строке испорчено ровно одно
+    поле. Один и тот же seed дает одни и те же строки.
+
+    python -m benchmarks.generator --rows 1000 --invalid 0.1 --out table.csv
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+from homework.config import PASSPORT_TYPE, PASSPORT_FORMAT, INTERNATIONAL_PASSPORT_TYPE, \
+    INTERNATIONAL_PASSPORT_FORMAT, DRIVER_LICENSE_TYPE, DRIVER_LICENSE_FORMAT, PHONE_FORMAT
+from homework.normalizer import OPERATORS_CODE
+
+FIRST_NAMES = ("Кондрат", "Евпатий", "Ада", "Миртл", "Евлампия", "Кузя", "Гарри", "Рон",
+               "Билл", "Владимир", "Гопник", "Фёдор", "Алан", "Грейс", "Линус", "Ольга")
+LAST_NAMES = ("Рюрик", "Коловрат", "Лавлейс", "Плакса", "Кузьмин", "Поттер", "Уизли", "Гейтс",
+              "Достоевский", "Тьюринг", "Хоппер", "Торвальдс", "Ковалевская", "Менделеев")
+DOCUMENTS = ((PASSPORT_TYPE, len(PASSPORT_FORMAT)),
+             (INTERNATIONAL_PASSPORT_TYPE, len(INTERNATIONAL_PASSPORT_FORMAT)),
+             (DRIVER_LICENSE_TYPE, len(DRIVER_LICENSE_FORMAT)))
+OPERATORS = sorted(OPERATORS_CODE)
+BAD_OPERATORS = sorted(set(range(900, 1000)) - OPERATORS_CODE)
+FIRST_DAY = date(1900, 1, 1)
+DAYS = (date(2020, 12, 31) - FIRST_DAY).days
+FIELDS = ("first_name", "last_name", "birth_date", "phone", "document_type", "document_id")
+
+
+class PatientGenerator:
+    """
+        Строки пациентов из шести строковых полей.
+        invalid - доля некорректных строк, rows отдает пары
+        (поля, корректна ли строка)
+    """
+
+    def __init__(self, seed=0, invalid=0.0):
+        self.random = random.Random(seed)
+        self.invalid = invalid
+
+    def name(self, names):
+        return self.random.choice(names)
+
+    def birth_date(self):
+        day = FIRST_DAY + timedelta(days=self.random.randrange(DAYS))
+        return day.isoformat() if self.random.random() < 0.8 else day.strftime("%d.%m.%Y")
+
+    def phone(self, operators=OPERATORS):
+        digits = f"{self.random.choice(operators)}{self.random.randrange(10 ** 7):07}"
+        prefix = self.random.choice(("8", "+7", "7"))
+        style = self.random.randrange(3)
+        if style == 0:
+            return prefix + digits
+        if style == 1:
+            return f"{prefix} ({digits[:3]}) {digits[3:6]}-{digits[6:8]}-{digits[8:]}"
+        return f"{prefix}-{digits[:3]}-{digits[3:6]}-{digits[6:8]}-{digits[8:]}"
+
+    def document(self):
+        document_type, size = self.random.choice(DOCUMENTS)
+        number = f"{self.random.randrange(10 ** size):0{size}}"
+        if self.random.random() < 0.5:
+            number = f"{number[:4]} {number[4:]}"
+        if self.random.random() < 0.3:
+            document_type = document_type.capitalize()
+        return document_type, number
+
+    def valid(self):
+        document_type, document_id = self.document()
+        return (self.name(FIRST_NAMES), self.name(LAST_NAMES), self.birth_date(),
+                self.phone(), document_type, document_id)
+
+    def corrupt(self, params):
+        params = list(params)
+        field = self.random.randrange(len(FIELDS))
+        if field < 2:
+            params[field] = params[field][:2] + "7" + params[field][2:]
+        elif field == 2:
+            params[field] = self.random.choice(("31.02.1990", "вчера", "1990-13-01"))
+        elif field == 3:
+            params[field] = self.random.choice((self.phone(BAD_OPERATORS), PHONE_FORMAT[:-1], "8916abc0000"))
+        elif field == 4:
+            params[field] = "пропуск"
+        else:
+            params[field] = params[field] + "1"
+        return tuple(params)
+
+    def rows(self, count):
+        for _ in range(count):
+            params = self.valid()
+            if self.random.random() < self.invalid:
+                yield self.corrupt(params), False
+            else:
+                yield params, True
+
+    def patients(self, count):
+        """Только корректные строки полей"""
+        for _ in range(count):
+            yield self.valid()
+
+
+def write_csv(path, count, seed=0, invalid=0.0):
+    """Файл коллекции из сгенерированных строк, как они пришли бы извне"""
+    with open(path, "w", encoding="utf-8") as table:
+        for params, _ in PatientGenerator(seed, invalid).rows(count):
+            table.write(",".join(params) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--invalid", type=float, default=0.0)
+    parser.add_argument("--out", default="table.csv")
+    args = parser.parse_args()
+    write_csv(args.out, args.rows, args.seed, args.invalid)
+
+
+if __name__ == "__main__":
+    main()
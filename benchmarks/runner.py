@@ -0,0 +1,202 @@
+"""
+    Набор бенчмарков Patient и PatientCollection на данных из
+    benchmarks.generator.
+
+    Для каждого сценария и размера: строк в секунду, p99 задержки
+    одной операции (по выборке до LATENCY_SAMPLE операций) и пик
+    памяти по tracemalloc (отдельным прогоном, --no-memory его
+    пропускает). Результаты пишутся в JSON, с --baseline прогон
+    сравнивается с сохраненным и завершается с кодом 1, если
+    скорость упала или память выросла больше чем на --tolerance.
+
+    python -m benchmarks.runner --rows 1000 100000 --save baseline.json
+    python -m benchmarks.runner --rows 1000 100000 --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.generator import PatientGenerator
+from homework.logger import configure_logging
+from homework.patient import Patient, PatientCollection, CollectionIterator
+
+LATENCY_SAMPLE = 100000
+# построчный save открывает файл на каждую строку, его гоняем на меньшем объеме
+SAVE_ROWS_LIMIT = 100000
+
+
+class Reservoir:
+    """Равномерная выборка задержек фиксированного размера"""
+
+    def __init__(self, size=LATENCY_SAMPLE, seed=0):
+        self.size = size
+        self.values = []
+        self.seen = 0
+        self.random = random.Random(seed)
+
+    def add(self, value):
+        self.seen += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            i = self.random.randrange(self.seen)
+            if i < self.size:
+                self.values[i] = value
+
+    def quantile(self, q):
+        if not self.values:
+            return 0.0
+        values = sorted(self.values)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def timed_ops(operations):
+    """
+        Выполняет операции по одной и замеряет каждую, возвращает
+        (число, время, выборка). Время - сумма времени операций:
+        данные генерируются на лету, и генерация в замер не входит
+    """
+    clock = time.perf_counter
+    latencies = Reservoir()
+    count = 0
+    total = 0.0
+    for operation in operations:
+        begin = clock()
+        operation()
+        latency = clock() - begin
+        latencies.add(latency)
+        total += latency
+        count += 1
+    return count, total, latencies
+
+
+def construct(rows, workdir):
+    return (lambda params=params: Patient(*params) for params in PatientGenerator(1).patients(rows))
+
+
+def construct_invalid(rows, workdir):
+    def reject(params):
+        try:
+            Patient(*params)
+        except (TypeError, ValueError):
+            pass
+    return (lambda params=params: reject(params)
+            for params, _ in PatientGenerator(2, invalid=1.0).rows(rows))
+
+
+def save(rows, workdir):
+    rows = min(rows, SAVE_ROWS_LIMIT)
+    return (Patient(*params).save for params in PatientGenerator(3).patients(rows))
+
+
+def save_many(rows, workdir):
+    patients = (Patient(*params) for params in PatientGenerator(4).patients(rows))
+    path = os.path.join(workdir, "save_many.csv")
+    writer = PatientCollection(path).writer()
+
+    def operations():
+        with writer:
+            for patient in patients:
+                yield lambda patient=patient: writer.write(patient)
+    return operations()
+
+
+def iterate(trusted=False, lazy=False):
+    def scenario(rows, workdir):
+        path = os.path.join(workdir, f"iterate_{rows}.csv")
+        if not os.path.exists(path):
+            PatientCollection(path).save_many(Patient(*params) for params in PatientGenerator(5).patients(rows))
+        iterator = CollectionIterator(path, trusted=trusted, lazy=lazy)
+        return (lambda: next(iterator) for _ in range(rows))
+    return scenario
+
+
+SCENARIOS = {
+    "construct": construct,
+    "construct_invalid": construct_invalid,
+    "save": save,
+    "save_many": save_many,
+    "iterate": iterate(),
+    "iterate_trusted": iterate(trusted=True),
+    "iterate_lazy": iterate(lazy=True),
+}
+
+
+def run(name, rows, workdir, memory=True):
+    scenario = SCENARIOS[name]
+    count, elapsed, latencies = timed_ops(scenario(rows, workdir))
+    result = {"rows": count, "seconds": elapsed, "rows_per_second": count / elapsed if elapsed else 0.0,
+              "p99_us": latencies.quantile(0.99) * 1e6}
+    if memory:
+        operations = scenario(rows, workdir)
+        tracemalloc.start()
+        for operation in operations:
+            operation()
+        result["peak_mib"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """Список регрессий относительно baseline"""
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if result["rows_per_second"] < old["rows_per_second"] * (1 - tolerance):
+            regressions.append(f"{key}: {result['rows_per_second']:.0f} rows/s, "
+                               f"baseline {old['rows_per_second']:.0f}")
+        if "peak_mib" in result and "peak_mib" in old and \
+                result["peak_mib"] > old["peak_mib"] * (1 + tolerance) + 0.5:
+            regressions.append(f"{key}: peak {result['peak_mib']:.1f} MiB, baseline {old['peak_mib']:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--save", help="записать результаты в JSON")
+    parser.add_argument("--baseline", help="сравнить с JSON прошлого прогона")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # Patient.save и логи пишут в текущую директорию
+        os.chdir(workdir)
+        configure_logging(os.path.join(workdir, "info.txt"), os.path.join(workdir, "errors.txt"))
+        try:
+            for rows in args.rows:
+                for name in args.scenarios:
+                    result = run(name, rows, workdir, not args.no_memory)
+                    results[f"{name}/{rows}"] = result
+                    memory = f", peak {result['peak_mib']:8.1f} MiB" if "peak_mib" in result else ""
+                    print(f"{name:>18} {rows:>9}: {result['rows_per_second']:12.0f} rows/s, "
+                          f"p99 {result['p99_us']:9.1f} us{memory}")
+        finally:
+            os.chdir(cwd)
+            configure_logging(os.path.abspath("info.txt"), os.path.abspath("errors.txt"))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import asyncio
+import itertools
+import weakref
+
+from homework.config import SAVE_BATCH_SIZE, ASYNC_READ_BATCH_SIZE
+from homework.logger import logger_info
+from homework.patient import CollectionIterator, PatientCollection, open_collection
+
+
+class AsyncPatientWriter:
+    """
+        Единственная задача-писатель для коллекции в цикле событий.
+        Одновременные save собираются из очереди в пачки до
+        batch_size пациентов и дописываются одним
+        collection.append в фоновом потоке. Если пачка не
+        записалась, пациенты пишутся по одному, и каждый save
+        получает свою ошибку, а не ошибку соседа по пачке
+    """
+
+    def __init__(self, collection, batch_size=SAVE_BATCH_SIZE):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.queue = asyncio.Queue()
+        self.task = None
+
+    async def save(self, patient):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((patient, future))
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        await future
+
+    async def run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while not self.queue.empty() and len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+            await self.write(batch)
+
+    async def write(self, batch):
+        try:
+            await asyncio.to_thread(self.append, [patient for patient, _ in batch])
+        except Exception as error:
+            if len(batch) > 1:
+                # пачка не записана целиком, append пишет все или ничего
+                for item in batch:
+                    await self.write([item])
+                return
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(error)
+        else:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    def append(self, patients):
+        self.collection.append(patients)
+        logger_info.info(f"Patients were saved: {len(patients)}")
+
+
+# писатели привязаны к своему циклу событий
+writers = weakref.WeakKeyDictionary()
+
+
+def get_writer(path=None, backend=None):
+    """Писатель коллекции open_collection(backend, path), по умолчанию STORAGE_BACKEND"""
+    collection = open_collection(backend, path)
+    loop_writers = writers.setdefault(asyncio.get_running_loop(), {})
+    if collection not in loop_writers:
+        loop_writers[collection] = AsyncPatientWriter(collection)
+    return loop_writers[collection]
+
+
+async def save_patient(patient, path=None, backend=None):
+    await get_writer(path, backend).save(patient)
+
+
+class AsyncPatientCollection:
+    """
+        PatientCollection для asyncio: файл читается пачками
+        в фоновых потоках, цикл событий не ждет диска.
+
+        async for patient in collection
+        await collection.limit(n) - список первых n пациентов
+        await collection.save(patient) - запись через общего писателя
+    """
+
+    def __init__(self, path, trusted=False, batch_size=ASYNC_READ_BATCH_SIZE):
+        self.path = path
+        self.trusted = trusted
+        self.batch_size = batch_size
+        self.collection = PatientCollection(path, trusted)
+
+    def __aiter__(self):
+        return self.iterate()
+
+    async def iterate(self, limit=None):
+        iterator = CollectionIterator(self.path, limit, trusted=self.trusted)
+        while True:
+            batch = await asyncio.to_thread(list, itertools.islice(iterator, self.batch_size))
+            if not batch:
+                return
+            for patient in batch:
+                yield patient
+
+    async def limit(self, n):
+        return await asyncio.to_thread(list, self.collection.limit(n))
+
+    async def save(self, patient):
+        await save_patient(patient, self.path, "csv")
+
+    async def save_many(self, patients, batch_size=SAVE_BATCH_SIZE):
+        return await asyncio.to_thread(self.collection.save_many, patients, batch_size)
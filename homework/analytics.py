@@ -0,0 +1,80 @@
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:  # numpy нужен только для аналитики
+    np = None
+
+
+class PatientArrays:
+    """
+        Столбцы csv в виде массивов numpy, без создания Patient.
+
+        birth_date - datetime64[D], phone - int64, operator - код
+        оператора int16, document_type - коды категорий, сами
+        категории лежат в document_types
+    """
+
+    def __init__(self, columns):
+        first_name, last_name, birth_date, phone, document_type, document_id = columns[:6]
+        self.first_name = np.array(first_name, dtype=str)
+        self.last_name = np.array(last_name, dtype=str)
+        # str(datetime) обрезается до YYYY-MM-DD приведением к U10
+        self.birth_date = np.array(birth_date, dtype="U10").astype("datetime64[D]")
+        self.phone = np.array(phone, dtype=str).astype(np.int64)
+        self.operator = (self.phone // 10 ** 7 % 1000).astype(np.int16)
+        self.document_types, codes = np.unique(np.array(document_type, dtype=str), return_inverse=True)
+        self.document_type = codes.astype(np.int16)
+        self.document_id = np.array(document_id, dtype=str)
+
+    def __len__(self):
+        return len(self.phone)
+
+    def ages(self, today=None):
+        """Полных лет на дату today"""
+        today = np.datetime64(today or date.today(), "D")
+        months = self.birth_date.astype("datetime64[M]")
+        years = self.birth_date.astype("datetime64[Y]").astype(np.int64)
+        month = months.astype(np.int64) % 12
+        day = (self.birth_date - months).astype(np.int64)
+        today_months = today.astype("datetime64[M]")
+        today_month = today_months.astype(np.int64) % 12
+        today_day = (today - today_months).astype(np.int64)
+        not_yet = (month > today_month) | ((month == today_month) & (day > today_day))
+        return today.astype("datetime64[Y]").astype(np.int64) - years - not_yet
+
+    def age_buckets(self, width=10, today=None):
+        """Число пациентов по возрастным группам {нижняя граница: количество}"""
+        ages = self.ages(today)
+        counts = np.bincount(np.clip(ages, 0, None) // width)
+        return {int(i) * width: int(count) for i, count in enumerate(counts) if count}
+
+    def counts_by_operator(self):
+        codes, counts = np.unique(self.operator, return_counts=True)
+        return dict(zip(codes.tolist(), counts.tolist()))
+
+    def counts_by_document_type(self):
+        counts = np.bincount(self.document_type, minlength=len(self.document_types))
+        return dict(zip(self.document_types.tolist(), counts.tolist()))
+
+
+def to_arrays(path):
+    if np is None:
+        raise ImportError("numpy is required for columnar export")
+    with open(path, "r", encoding="utf-8") as table:
+        text = table.read()
+    # недописанную последнюю строку пропускаем, как и CollectionIterator
+    text = text[:text.rfind("\n") + 1].rstrip("\n")
+    if not text:
+        return PatientArrays([()] * 6)
+    # все строки одной ширины: режем файл на поля одним split,
+    # а столбцы получаем срезами с шагом. Строки с ключом и без
+    # (6 и 7 полей) могут дать кратное ширине число полей, поэтому
+    # сверяем его с числом строк, иначе разбираем построчно
+    end = text.find("\n")
+    width = text.count(",", 0, end if end != -1 else len(text)) + 1
+    fields = text.replace("\n", ",").split(",")
+    if len(fields) != (text.count("\n") + 1) * width:
+        rows = [line.split(",") for line in text.split("\n")]
+        return PatientArrays(list(zip(*rows)))
+    return PatientArrays([fields[i::width] for i in range(width)])
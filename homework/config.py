@@ -11,3 +11,34 @@ INTERNATIONAL_PASSPORT_FORMAT = "000000000"  # формат хранения з
 
 DRIVER_LICENSE_TYPE = "водительское удостоверение"  # тип документа, если это водительское удостоверение
 DRIVER_LICENSE_FORMAT = "0000000000"  # формат хранения номера ВУ
+
+SAVE_BATCH_SIZE = 1000  # сколько строк PatientWriter копит в буфере перед записью на диск
+
+INDEX_SUFFIX = ".idx"  # индекс смещений строк хранится рядом с csv: table.csv.idx
+READ_CHUNK_SIZE = 1 << 20  # размер блока при потоковом чтении csv
+DATE_CACHE_SIZE = 4096  # сколько разобранных дат рождения держать в LRU кэше
+FIELD_INDEX_SUFFIX = ".fields.json"  # вторичные индексы по телефону, документу и фамилии
+FIELD_INDEX_DELTA_SUFFIX = ".delta"  # дописанные в индексы строки: table.csv.fields.json.delta
+
+ASYNC_LOGGING = False  # писать логи в отдельном потоке через очередь
+LOG_QUEUE_SIZE = 10000  # максимальная длина очереди записей лога
+LOG_BATCH_SIZE = 256  # сколько записей поток лога пишет за один сброс на диск
+LOG_QUEUE_POLICY = "block"  # "block" - ждать места в очереди, "drop" - отбрасывать записи
+IMPORT_CHUNK_SIZE = 1 << 22  # размер куска входного файла на один процесс при импорте
+IMPORT_REPORT_SUFFIX = ".rejected.csv"  # отчет об отклоненных строках: source.csv.rejected.csv
+ASYNC_READ_BATCH_SIZE = 1000  # сколько строк AsyncPatientCollection читает в фоновом потоке за раз
+
+STORAGE_BACKEND = "csv"  # где хранить пациентов: "csv", "binary" или "sqlite"
+BINARY_PATH = "table.bin"  # файл бинарного хранилища
+SQLITE_PATH = "patients.db"  # база sqlite-хранилища
+SQLITE_POOL_SIZE = 4  # сколько соединений sqlite держать открытыми
+
+DEDUP_PARTITIONS = 64  # на сколько временных файлов делятся блоки при поиске дублей
+NAME_SIMILARITY = 0.8  # порог похожести имен (difflib) при одинаковых фамилии и дате рождения
+
+METRICS_SAMPLE_RATE = 16  # homework.metrics замеряет время у каждого N-го вызова
+
+SCAN_CHUNK_SIZE = 1 << 22  # размер куска файла на одну задачу parallel_map/parallel_reduce
+
+FOLLOW_POLL_MIN = 0.05  # первый интервал опроса файла в follow(), секунды
+FOLLOW_POLL_MAX = 2.0  # интервал опроса растет вдвое без новых строк до этого значения
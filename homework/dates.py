@@ -0,0 +1,41 @@
+from datetime import datetime
+from functools import lru_cache
+
+from homework.config import DATE_CACHE_SIZE
+
+counters = {"fast": 0, "fallback": 0}
+
+
+def _parse_date(value):
+    # YYYY-MM-DD из форм и str(datetime) из нашего csv разбираем
+    # без dateutil, он нужен только для произвольных форматов
+    if len(value) in (10, 19) and value[4] == "-" and value[7] == "-":
+        try:
+            result = datetime.fromisoformat(value)
+        except ValueError:
+            pass
+        else:
+            counters["fast"] += 1
+            return result
+    counters["fallback"] += 1
+    # dateutil загружается только при первой дате не в ISO формате
+    from dateutil.parser import parse
+    return parse(value)
+
+
+# даты рождения часто повторяются, datetime неизменяем -
+# результаты можно отдавать из кэша
+parse_date = lru_cache(maxsize=DATE_CACHE_SIZE)(_parse_date)
+
+
+def date_stats():
+    """Попадания и промахи кэша, число разборов быстрым путем и через dateutil"""
+    info = parse_date.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize,
+            "max_size": info.maxsize, **counters}
+
+
+def clear_date_cache():
+    parse_date.cache_clear()
+    for key in counters:
+        counters[key] = 0
@@ -0,0 +1,160 @@
+import os
+import tempfile
+import zlib
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from homework.config import DEDUP_PARTITIONS, NAME_SIMILARITY
+
+
+class DisjointSet:
+    """Объединение строк-дублей в кластеры, хранит только строки из найденных пар"""
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, row):
+        root = row
+        while self.parent.setdefault(root, root) != root:
+            root = self.parent[root]
+        while self.parent[row] != root:
+            self.parent[row], row = root, self.parent[row]
+        return root
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parent[max(first, second)] = min(first, second)
+
+    def clusters(self):
+        """
+            Кластеры по возрастанию первой строки. Корень кластера -
+            его наименьшая строка, кластеры отдаются по одному и
+            сразу освобождаются
+        """
+        groups = defaultdict(list)
+        for row in self.parent:
+            groups[self.find(row)].append(row)
+        self.parent = {}
+        for root in sorted(groups):
+            yield sorted(groups.pop(root))
+
+
+def blocking_keys(line):
+    """
+        Ключи блоков строки csv: нормализованный телефон, тип и
+        номер документа, фамилия и дата рождения. Для блока по
+        фамилии к ключу прикладывается имя для сравнения
+    """
+    first_name, last_name, birth_date, phone, document_type, document_id = line.split(",")[:6]
+    return (("phone", phone, ""),
+            ("document", f"{document_type.lower()} {document_id}", ""),
+            ("name", f"{last_name.lower()} {birth_date[:10]}", first_name.lower()))
+
+
+def similar_names(first, second, threshold=NAME_SIMILARITY):
+    return first == second or SequenceMatcher(None, first, second).ratio() >= threshold
+
+
+def partition(key, partitions):
+    return zlib.crc32(key.encode("utf-8")) % partitions
+
+
+def record_key(line):
+    """Ключ записи из строки csv, пустая строка для строк без ключа"""
+    fields = line.split(",")
+    return fields[6] if len(fields) > 6 else ""
+
+
+def latest_versions(path):
+    """
+        Последняя версия каждого ключа из одного временного файла
+        версий: {ключ: (строка, блоки строки)}
+    """
+    latest = {}
+    with open(path, encoding="utf-8") as versions:
+        for record in versions:
+            key, row, blocks = record.rstrip("\n").split("\t", 2)
+            row = int(row)
+            if key not in latest or latest[key][0] < row:
+                latest[key] = (row, blocks)
+    return latest
+
+
+def duplicate_rows(lines, partitions=DEDUP_PARTITIONS, directory=None, live=True):
+    """
+        Генератор кластеров номеров строк-дублей.
+
+        Вместо сравнения всех пар строки раскладываются по блокам
+        с одинаковым ключом, блоки хэшем ключа делятся на partitions
+        временных файлов, и в памяти одновременно держится только
+        один такой файл. Сравниваются только строки внутри блока:
+        по телефону и документу совпадение ключа уже означает дубль,
+        в блоке фамилия + дата рождения сравниваются имена.
+
+        live=True - только последние версии записей: строки с
+        ключом сначала раскладываются хэшем ключа по своим
+        временным файлам, и в блоки попадают только строки с
+        наибольшим номером для каждого ключа. Номера строк - номера
+        строк во входе, с устаревшими версиями
+    """
+    duplicates = DisjointSet()
+    with tempfile.TemporaryDirectory(dir=directory) as temp:
+        paths = [os.path.join(temp, f"{i}.part") for i in range(partitions)]
+        version_paths = [os.path.join(temp, f"{i}.versions") for i in range(partitions if live else 0)]
+        files = [open(path, "w", encoding="utf-8") for path in paths]
+
+        def spill(row, blocks):
+            for block, name in blocks:
+                files[partition(block, partitions)].write(f"{block}\t{row}\t{name}\n")
+
+        try:
+            version_files = [open(path, "w", encoding="utf-8") for path in version_paths]
+            try:
+                for row, line in enumerate(lines):
+                    blocks = [(f"{kind} {key}", name) for kind, key, name in blocking_keys(line)]
+                    key = record_key(line) if live else ""
+                    if not key:
+                        spill(row, blocks)
+                        continue
+                    packed = "\t".join(f"{block}\t{name}" for block, name in blocks)
+                    version_files[partition(key, partitions)].write(f"{key}\t{row}\t{packed}\n")
+            finally:
+                for versions in version_files:
+                    versions.close()
+
+            for path in version_paths:
+                for row, packed in latest_versions(path).values():
+                    fields = packed.split("\t")
+                    spill(row, zip(fields[::2], fields[1::2]))
+        finally:
+            for file in files:
+                file.close()
+
+        for path in paths:
+            blocks = defaultdict(list)
+            with open(path, encoding="utf-8") as part:
+                for record in part:
+                    block, row, name = record.rstrip("\n").split("\t")
+                    blocks[block].append((int(row), name))
+            for block, rows in blocks.items():
+                if len(rows) < 2:
+                    continue
+                if not block.startswith("name "):
+                    for row, _ in rows[1:]:
+                        duplicates.union(rows[0][0], row)
+                    continue
+                names = defaultdict(list)
+                for row, name in rows:
+                    names[name].append(row)
+                for same in names.values():
+                    for row in same[1:]:
+                        duplicates.union(same[0], row)
+                distinct = list(names.items())
+                for i, (name, same) in enumerate(distinct):
+                    for other_name, other in distinct[i + 1:]:
+                        if similar_names(name, other_name):
+                            duplicates.union(same[0], other[0])
+    # строки одного кластера могут попасть в разные временные файлы,
+    # поэтому кластеры готовы только после разбора всех файлов
+    yield from duplicates.clusters()
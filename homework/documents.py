@@ -0,0 +1,116 @@
+import re
+
+from homework.config import PASSPORT_TYPE, INTERNATIONAL_PASSPORT_TYPE, DRIVER_LICENSE_TYPE
+from homework.normalizer import extract_digits
+
+
+class DocumentType:
+    """
+        Тип документа: имя, код (порядковый номер регистрации,
+        он же код в бинарном формате) и проверка номера.
+
+        size - число цифр номера, pattern - регулярное выражение
+        для нормализованного номера, normalizer - своя функция
+        нормализации (по умолчанию - цифры номера). Проверка
+        собирается один раз при регистрации в функцию normalize,
+        которая возвращает номер в формате хранения или None
+    """
+
+    def __init__(self, name, code, size=None, pattern=None, normalizer=None):
+        self.name = name
+        self.code = code
+        self.size = size
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.normalizer = normalizer or extract_digits
+        self.normalize = self.compile()
+
+    def compile(self):
+        normalizer, size = self.normalizer, self.size
+        match = self.pattern.fullmatch if self.pattern is not None else None
+        if match is None and size is not None:
+            def normalize(value):
+                number = normalizer(value)
+                return number if number is not None and len(number) == size else None
+        elif match is None:
+            def normalize(value):
+                return normalizer(value)
+        else:
+            def normalize(value):
+                number = normalizer(value)
+                if number is None or size is not None and len(number) != size:
+                    return None
+                return number if match(number) else None
+        return normalize
+
+    def __repr__(self):
+        return f"DocumentType({self.name!r}, code={self.code})"
+
+
+class DocumentTypeRegistry:
+    """
+        Реестр типов документов. Имена хранятся в нижнем регистре,
+        поиск типа - один-два обращения к словарю без лишнего
+        str.lower для уже нормализованных имен
+    """
+
+    def __init__(self):
+        self.types = {}
+        self.codes = []
+
+    def register(self, name, size=None, pattern=None, normalizer=None):
+        key = name.lower()
+        if key in self.types:
+            raise ValueError(f"Document type already registered: {name}")
+        # код типа в бинарном формате занимает один байт
+        if len(self.codes) > 255:
+            raise ValueError("Too many document types")
+        document = DocumentType(key, len(self.codes), size, pattern, normalizer)
+        self.types[key] = document
+        self.codes.append(document)
+        return document
+
+    def unregister(self, name):
+        """
+            Удаляет тип. Код типа - его место в порядке регистрации,
+            поэтому удалить можно только последний добавленный тип
+        """
+        document = self[name]
+        if document is not self.codes[-1]:
+            raise ValueError(f"Only the last registered type can be removed: {name}")
+        del self.types[document.name]
+        self.codes.pop()
+
+    def get(self, name):
+        document = self.types.get(name)
+        if document is None and isinstance(name, str):
+            document = self.types.get(name.lower())
+        return document
+
+    def __getitem__(self, name):
+        document = self.get(name)
+        if document is None:
+            raise KeyError(name)
+        return document
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __iter__(self):
+        return (document.name for document in self.codes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def by_code(self, code):
+        return self.codes[code]
+
+    def normalize(self, name, number):
+        """Номер документа в формате хранения, None для неизвестного типа или неверного номера"""
+        document = self.get(name)
+        return document.normalize(number) if document is not None else None
+
+
+document_types = DocumentTypeRegistry()
+document_types.register(PASSPORT_TYPE, 10)
+document_types.register(INTERNATIONAL_PASSPORT_TYPE, 9)
+document_types.register(DRIVER_LICENSE_TYPE, 10)
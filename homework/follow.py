@@ -0,0 +1,255 @@
+import ctypes
+import os
+import select
+import struct
+import time
+from collections import namedtuple
+
+from homework.config import FOLLOW_POLL_MIN, FOLLOW_POLL_MAX
+from homework.logger import logger_info
+
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT = struct.Struct("iIII")
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# контрольная точка follow(): смещение и файл (st_dev, st_ino), к которому оно относится
+Checkpoint = namedtuple("Checkpoint", ["offset", "dev", "ino"])
+
+
+class PollingWatcher:
+    """
+        Ожидание изменений опросом: интервал начинается с
+        min_interval и удваивается, пока новых строк нет,
+        до max_interval. reset() после новых строк
+    """
+
+    def __init__(self, path, min_interval=FOLLOW_POLL_MIN, max_interval=FOLLOW_POLL_MAX):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+
+    def wait(self, timeout=None):
+        interval = self.interval if timeout is None else min(self.interval, timeout)
+        time.sleep(interval)
+        self.interval = min(self.interval * 2, self.max_interval)
+
+    def reset(self):
+        self.interval = self.min_interval
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+        Ожидание изменений через inotify (Linux, libc через ctypes).
+        Следит за директорией файла, чтобы видеть и запись, и
+        замену файла при ротации или compact(). max_interval -
+        страховочный таймаут ожидания
+    """
+
+    libc = None
+
+    def __init__(self, path, min_interval=FOLLOW_POLL_MIN, max_interval=FOLLOW_POLL_MAX):
+        libc = self.load_libc()
+        self.name = os.fsencode(os.path.basename(path))
+        self.max_interval = max_interval
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        directory = os.fsencode(os.path.dirname(os.path.abspath(path)))
+        if libc.inotify_add_watch(self.fd, directory, WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, "inotify_add_watch failed")
+
+    @classmethod
+    def load_libc(cls):
+        if cls.libc is None:
+            # символы libc уже загружены в процесс, find_library не нужен
+            libc = ctypes.CDLL(None, use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            cls.libc = libc
+        return cls.libc
+
+    def wait(self, timeout=None):
+        timeout = self.max_interval if timeout is None else min(timeout, self.max_interval)
+        deadline = time.monotonic() + timeout
+        while True:
+            ready, _, _ = select.select([self.fd], [], [], max(0.0, deadline - time.monotonic()))
+            if not ready or self.drain():
+                return
+
+    def drain(self):
+        """Читает накопленные события, True - среди них есть события нашего файла"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        position = 0
+        while position < len(data):
+            _, _, _, size = EVENT.unpack_from(data, position)
+            name = data[position + EVENT.size:position + EVENT.size + size].rstrip(b"\0")
+            if name == self.name:
+                return True
+            position += EVENT.size + size
+        return False
+
+    def reset(self):
+        pass
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def make_watcher(path, inotify=True):
+    if inotify:
+        try:
+            return InotifyWatcher(path)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(path)
+
+
+class Follower:
+    """
+        Лента новых строк коллекции: отдает пациентов с from_offset
+        до конца файла и дальше ждет новых строк, не перечитывая
+        файл с начала.
+
+        offset - смещение конца последней отданной строки,
+        checkpoint - оно же вместе с dev и inode файла. Если
+        сохранять checkpoint после обработки записи,
+        follow(from_offset=checkpoint) продолжит со следующей
+        строки. from_offset может быть и просто смещением.
+
+        Файл, который стал короче offset (truncate), и файл с
+        другим inode (ротация, compact()) читаются с начала, как и
+        смещение, перед которым в файле не перевод строки. Число
+        таких сбросов - в resets. Записи несут ключи, поэтому
+        повторно отданные после сброса строки можно склеить по key.
+
+        timeout - закончить, если новых строк нет столько секунд,
+        None - ждать, пока не вызовут stop()
+    """
+
+    def __init__(self, collection, from_offset=0, timeout=None, inotify=True):
+        self.collection = collection
+        self.path = collection.path
+        if isinstance(from_offset, Checkpoint):
+            self.offset, self.expected = from_offset.offset, (from_offset.dev, from_offset.ino)
+        else:
+            self.offset, self.expected = from_offset, None
+        self.timeout = timeout
+        self.inotify = inotify
+        self.resets = 0
+        self.stopped = False
+        self.iterator = None
+        self.inode = None
+
+    def __iter__(self):
+        return self.records()
+
+    def stop(self):
+        self.stopped = True
+
+    def open(self):
+        """Открывает файл с offset, False - файла пока нет"""
+        from homework.patient import CollectionIterator
+        try:
+            iterator = CollectionIterator(self.path, offset=self.offset, trusted=self.collection.trusted,
+                                          lazy=self.collection.lazy)
+        except FileNotFoundError:
+            return False
+        stat = os.fstat(iterator.collection.fileno())
+        reason = self.stale(iterator.collection, stat) if self.offset else None
+        if reason:
+            iterator.collection.seek(0)
+            iterator.offset = 0
+            self.reset(reason)
+        self.iterator, self.inode, self.expected = iterator, (stat.st_dev, stat.st_ino), None
+        return True
+
+    def stale(self, f, stat):
+        """Почему контрольная точка не подходит к открытому файлу, None - подходит"""
+        if self.expected is not None and self.expected != (stat.st_dev, stat.st_ino):
+            return "replaced"
+        if stat.st_size < self.offset:
+            return "truncated"
+        f.seek(self.offset - 1)
+        if f.read(1) != b"\n":
+            return "changed"
+        return None
+
+    @property
+    def checkpoint(self):
+        dev, ino = self.inode or self.expected or (None, None)
+        return Checkpoint(self.offset, dev, ino)
+
+    def reset(self, reason):
+        self.offset = 0
+        self.resets += 1
+        logger_info.info(f"Follow restarted from the beginning, file was {reason}")
+
+    def changed(self):
+        """Файл заменили или обрезали: читать заново с начала"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if (stat.st_dev, stat.st_ino) != self.inode:
+            self.reset("replaced")
+            return True
+        if stat.st_size < self.iterator.collection.tell():
+            self.reset("truncated")
+            return True
+        return False
+
+    def records(self):
+        """Генератор пациентов, по завершении возвращает checkpoint"""
+        from homework.patient import patient_from_line
+        watcher = None
+        idle_since = time.monotonic()
+        try:
+            while not self.stopped:
+                if self.iterator is None and not self.open():
+                    line = None
+                else:
+                    line = self.iterator.next_line()
+                if line is not None:
+                    self.offset = self.iterator.offset
+                    if watcher is not None:
+                        watcher.reset()
+                    idle_since = time.monotonic()
+                    if line:
+                        yield patient_from_line(line, self.collection.trusted, self.collection.lazy)
+                    continue
+                if self.iterator is not None and self.changed():
+                    self.iterator = None
+                    continue
+                left = None
+                if self.timeout is not None:
+                    left = self.timeout - (time.monotonic() - idle_since)
+                    if left <= 0:
+                        break
+                if watcher is None:
+                    # наблюдатель создается при первом ожидании, строки,
+                    # дописанные до его появления, ловит повторная проверка
+                    watcher = make_watcher(self.path, self.inotify)
+                    continue
+                watcher.wait(left)
+        finally:
+            if watcher is not None:
+                watcher.close()
+            self.iterator = None
+        return self.checkpoint
@@ -0,0 +1,314 @@
+import json
+import os
+import zlib
+from array import array
+from bisect import bisect_left, insort
+
+from homework.config import INDEX_SUFFIX, FIELD_INDEX_SUFFIX, FIELD_INDEX_DELTA_SUFFIX, READ_CHUNK_SIZE
+
+
+def fingerprint(path, offsets, count, end):
+    """
+        CRC32 первой и последней из count проиндексированных строк
+        (последняя кончается на end). Если файл переписали на
+        месте, а не дописали, отпечаток того же префикса меняется,
+        даже когда на старой границе случайно стоит конец строки
+    """
+    if count == 0:
+        return 0
+    with open(path, "rb") as table:
+        table.seek(offsets[0])
+        crc = zlib.crc32(table.read((offsets[1] if count > 1 else end) - offsets[0]))
+        table.seek(offsets[count - 1])
+        return zlib.crc32(table.read(end - offsets[count - 1]), crc)
+
+
+class LineIndex:
+    """
+        Индекс смещений строк csv файла для произвольного доступа.
+
+        Хранится рядом с файлом (path + INDEX_SUFFIX) как array('Q'):
+        заголовок - версия формата, сколько байт файла
+        проиндексировано, mtime файла в наносекундах, st_dev и st_ino
+        файла, fingerprint проиндексированных строк, дальше смещения
+        начала каждой полной строки. Заголовок пишется после
+        смещений, поэтому оборванная запись индекса не выдает себя
+        за целую.
+
+        Перед каждым обращением сверяемся с размером, mtime и inode
+        файла: если в файл только дописывали (отпечаток старых строк
+        не изменился), индекс дочитывает хвост, если файл обрезали,
+        переписали или заменили (compact) - строится заново
+    """
+
+    HEADER_SIZE = 6
+    VERSION = 0x49445832  # "IDX2", индексы старого формата строятся заново
+
+    def __init__(self, path, index_path=None):
+        self.path = path
+        self.index_path = index_path or path + INDEX_SUFFIX
+        self.offsets = array("Q")
+        self.end = 0
+        self.mtime = 0
+        self.file = (0, 0)
+        self.crc = 0
+        self.load()
+
+    def __len__(self):
+        self.refresh()
+        return len(self.offsets)
+
+    def load(self):
+        data = array("Q")
+        try:
+            with open(self.index_path, "rb") as index:
+                data.frombytes(index.read())
+        except (OSError, ValueError):
+            return
+        if len(data) < self.HEADER_SIZE or data[0] != self.VERSION:
+            return
+        self.end, self.mtime = data[1], data[2]
+        self.file = (data[3], data[4])
+        self.crc = data[5]
+        self.offsets = data[self.HEADER_SIZE:]
+
+    def fingerprint(self):
+        return fingerprint(self.path, self.offsets, len(self.offsets), self.end)
+
+    def refresh(self):
+        stat = os.stat(self.path)
+        file = (stat.st_dev, stat.st_ino)
+        if stat.st_size == self.end and stat.st_mtime_ns == self.mtime and file == self.file:
+            return
+        if file == self.file and stat.st_size >= self.end and self.fingerprint() == self.crc:
+            count = len(self.offsets)
+            self.scan(self.end)
+            self.mtime = stat.st_mtime_ns
+            self.crc = self.fingerprint()
+            self.dump(count)
+        else:
+            self.offsets = array("Q")
+            self.end = 0
+            self.file = file
+            self.scan(0)
+            self.mtime = stat.st_mtime_ns
+            self.crc = self.fingerprint()
+            self.dump()
+
+    def scan(self, start):
+        line_start = start
+        with open(self.path, "rb") as table:
+            table.seek(start)
+            position = start
+            while True:
+                chunk = table.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                newline = chunk.find(b"\n")
+                while newline != -1:
+                    self.offsets.append(line_start)
+                    line_start = position + newline + 1
+                    newline = chunk.find(b"\n", newline + 1)
+                position += len(chunk)
+        self.end = line_start
+
+    def dump(self, keep=0):
+        # при дозаписи переписываем только новые смещения и заголовок
+        header = array("Q", [self.VERSION, self.end, self.mtime, *self.file, self.crc])
+        mode = "r+b" if keep and os.path.exists(self.index_path) else "wb"
+        if mode == "wb":
+            keep = 0
+        with open(self.index_path, mode) as index:
+            if mode == "wb":
+                # до записи заголовка файл не читается как индекс
+                array("Q", [0] * self.HEADER_SIZE).tofile(index)
+            index.seek((self.HEADER_SIZE + keep) * header.itemsize)
+            self.offsets[keep:].tofile(index)
+            index.truncate()
+            index.flush()
+            index.seek(0)
+            header.tofile(index)
+
+    def span(self, start, stop):
+        """Байтовый диапазон строк [start, stop)"""
+        self.refresh()
+        end = self.offsets[stop] if stop < len(self.offsets) else self.end
+        return self.offsets[start], end
+
+    def read_lines(self, start, stop):
+        if start >= stop:
+            return []
+        begin, end = self.span(start, stop)
+        with open(self.path, "rb") as table:
+            table.seek(begin)
+            data = table.read(end - begin)
+        return data.decode("utf-8").split("\n")[:-1]
+
+
+class FieldIndex:
+    """
+        Вторичные индексы по нормализованным значениям полей:
+        хэш-индексы телефон -> номера строк и (тип документа, номер)
+        -> номера строк, отсортированный список фамилий в нижнем
+        регистре для поиска по префиксу. latest - последняя строка
+        каждого ключа записи, строки устаревших версий (superseded)
+        поиск не отдает.
+
+        Хранится рядом с файлом (path + FIELD_INDEX_SUFFIX) в json.
+        Строки, дописанные после построения (Patient.save, save_many),
+        добавляются в индекс при следующем поиске и дописываются
+        строкой json в delta_path: [end, mtime, crc, первая строка,
+        [[телефон, ключ документа, фамилия, ключ записи], ...]], crc - fingerprint
+        проиндексированных строк, как у LineIndex. Весь json
+        переписывается, только когда индекс строится заново или
+        в delta_path строк больше, чем в основном файле. При
+        перезаписи файла индекс строится заново
+    """
+
+    def __init__(self, line_index, index_path=None):
+        self.line_index = line_index
+        self.path = line_index.path
+        self.index_path = index_path or self.path + FIELD_INDEX_SUFFIX
+        self.delta_path = self.index_path + FIELD_INDEX_DELTA_SUFFIX
+        self.clear()
+        self.load()
+
+    def clear(self):
+        self.end = 0
+        self.mtime = 0
+        self.file = [0, 0]
+        self.crc = 0
+        self.rows = 0
+        self.phones = {}
+        self.documents = {}
+        self.last_names = []
+        self.latest = {}
+        self.superseded = set()
+        self.base_rows = 0
+
+    def load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as index:
+                data = json.load(index)
+            self.end, self.mtime, self.rows = data["end"], data["mtime"], data["rows"]
+            self.file, self.crc = data["file"], data["crc"]
+            self.phones, self.documents = data["phones"], data["documents"]
+            self.last_names = [tuple(item) for item in data["last_names"]]
+            self.latest, self.superseded = data["latest"], set(data["superseded"])
+        except (OSError, ValueError, KeyError, TypeError):
+            self.clear()
+            return
+        self.base_rows = self.rows
+        self.load_delta()
+
+    def load_delta(self):
+        try:
+            with open(self.delta_path, "r", encoding="utf-8") as delta:
+                for line in delta:
+                    end, mtime, crc, first, entries = json.loads(line)
+                    if first != self.rows:
+                        raise ValueError("Delta does not continue the index")
+                    self.add(entries)
+                    self.end, self.mtime, self.crc = end, mtime, crc
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError):
+            # недописанная или чужая строка: применено все, что до нее,
+            # и индекс переписывается целиком, чтобы не дописывать после мусора
+            self.dump()
+
+    def dump(self):
+        data = {"end": self.end, "mtime": self.mtime, "rows": self.rows, "file": self.file, "crc": self.crc,
+                "phones": self.phones, "documents": self.documents,
+                "last_names": self.last_names, "latest": self.latest,
+                "superseded": sorted(self.superseded)}
+        # сначала удаляем дельту: если упадем до записи json,
+        # останется старый индекс без хвоста, и он дочитает строки заново
+        if os.path.exists(self.delta_path):
+            os.remove(self.delta_path)
+        # json.dumps кодирует C-реализацией, json.dump в файл - нет
+        with open(self.index_path, "w", encoding="utf-8") as index:
+            index.write(json.dumps(data, ensure_ascii=False))
+        self.base_rows = self.rows
+
+    def dump_delta(self, first, entries):
+        with open(self.delta_path, "a", encoding="utf-8") as delta:
+            delta.write(json.dumps([self.end, self.mtime, self.crc, first, entries], ensure_ascii=False) + "\n")
+
+    def refresh(self):
+        self.line_index.refresh()
+        end, mtime = self.line_index.end, self.line_index.mtime
+        file = list(self.line_index.file)
+        if end == self.end and mtime == self.mtime and file == self.file:
+            return
+        rebuild = file != self.file or end <= self.end or not self.same_prefix()
+        if rebuild:
+            self.clear()
+            self.file = file
+        first = self.rows
+        entries = []
+        for line in self.line_index.read_lines(first, len(self.line_index.offsets)):
+            fields = line.split(",")
+            _, last_name, _, phone, document_type, document_id = fields[:6]
+            key = fields[6] if len(fields) > 6 else ""
+            entries.append((phone, self.document_key(document_type, document_id), last_name.lower(), key))
+        self.add(entries)
+        self.end, self.mtime, self.crc = end, mtime, self.line_index.crc
+        if rebuild or self.rows - self.base_rows > self.base_rows:
+            self.dump()
+        else:
+            self.dump_delta(first, entries)
+
+    def same_prefix(self):
+        """Проиндексированные строки остались на месте: файл только дописывали"""
+        offsets = self.line_index.offsets
+        if self.rows > len(offsets):
+            return False
+        boundary = offsets[self.rows] if self.rows < len(offsets) else self.line_index.end
+        return boundary == self.end and fingerprint(self.path, offsets, self.rows, self.end) == self.crc
+
+    def add(self, entries):
+        """Добавляет в индексы строки self.rows, self.rows + 1, ..."""
+        new_names = []
+        for row, (phone, key, last_name, record) in enumerate(entries, self.rows):
+            self.phones.setdefault(phone, []).append(row)
+            self.documents.setdefault(key, []).append(row)
+            new_names.append((last_name, row))
+            if record:
+                if record in self.latest:
+                    self.superseded.add(self.latest[record])
+                self.latest[record] = row
+        if len(new_names) > len(self.last_names):
+            self.last_names.extend(new_names)
+            self.last_names.sort()
+        else:
+            for item in new_names:
+                insort(self.last_names, item)
+        self.rows += len(entries)
+
+    @staticmethod
+    def document_key(document_type, document_id):
+        # запятых в полях csv быть не может, ключ однозначен
+        return f"{document_type.lower()},{document_id}"
+
+    def live(self, rows):
+        return [row for row in rows if row not in self.superseded]
+
+    def by_phone(self, phone):
+        self.refresh()
+        return self.live(self.phones.get(phone, ()))
+
+    def by_document(self, document_type, document_id):
+        self.refresh()
+        return self.live(self.documents.get(self.document_key(document_type, document_id), ()))
+
+    def by_last_name(self, prefix):
+        self.refresh()
+        prefix = prefix.lower()
+        rows = []
+        for i in range(bisect_left(self.last_names, (prefix,)), len(self.last_names)):
+            last_name, row = self.last_names[i]
+            if not last_name.startswith(prefix):
+                break
+            rows.append(row)
+        return sorted(self.live(rows))
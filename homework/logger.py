@@ -1,9 +1,61 @@
+import atexit
 import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, WatchedFileHandler
+
+from homework.config import ASYNC_LOGGING, LOG_QUEUE_SIZE, LOG_BATCH_SIZE, LOG_QUEUE_POLICY, \
+    GOOD_LOG_FILE, ERROR_LOG_FILE
+
+
+class BatchFileHandler(WatchedFileHandler):
+    """
+        Файловый обработчик, который переоткрывает файл лога,
+        если его удалили или ротировали, вместо закрытия
+        обработчиков при удалении каждого Patient.
+
+        В пакетном режиме не сбрасывает буфер после каждой
+        записи, это делает поток лога один раз на пачку.
+
+        Файл открывается при первой записи (delay=True), импорт
+        модуля не создает файлов логов
+    """
+
+    batching = False
+
+    def __init__(self, filename, mode="a", encoding=None):
+        super().__init__(filename, mode, encoding, delay=True)
+
+    def set_file(self, filename):
+        """Переключает обработчик на другой файл, он откроется при следующей записи"""
+        self.acquire()
+        try:
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+            self.baseFilename = os.path.abspath(filename)
+            self.dev = self.ino = -1
+        finally:
+            self.release()
+
+    def flush(self):
+        if not self.batching:
+            super().flush()
+
+    def flush_batch(self):
+        self.acquire()
+        try:
+            if self.stream and hasattr(self.stream, "flush"):
+                self.stream.flush()
+        finally:
+            self.release()
+
 
 # логгер для отслеживания работы
 logger_info = logging.getLogger("Patient")
 logger_info.setLevel(logging.INFO)
-handler = logging.FileHandler("info.txt", 'a', 'utf-8')
+handler = BatchFileHandler(GOOD_LOG_FILE, 'a', 'utf-8')
 formatter = logging.Formatter("%(filename)s[LINE:%(lineno)d]# %(levelname)-8s [%(asctime)s]  %(message)s")
 handler.setFormatter(formatter)
 logger_info.addHandler(handler)
@@ -11,6 +63,160 @@ logger_info.addHandler(handler)
 # логгер для отслеживания ошибок
 logger_error = logging.getLogger("Error")
 logger_error.setLevel(logging.ERROR)
-handler_error = logging.FileHandler("errors.txt", 'a', 'utf-8')
+handler_error = BatchFileHandler(ERROR_LOG_FILE, 'a', 'utf-8')
 handler_error.setFormatter(formatter)
 logger_error.addHandler(handler_error)
+
+ROUTES = {logger_info: handler, logger_error: handler_error}
+
+
+def configure_logging(good_log_file=None, error_log_file=None):
+    """
+        Пути файлов логов, None - оставить текущий. Относительный
+        путь считается от текущей директории в момент вызова
+    """
+    if good_log_file is not None:
+        handler.set_file(good_log_file)
+    if error_log_file is not None:
+        handler_error.set_file(error_log_file)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+        Кладет записи в ограниченную очередь.
+        policy="block" - ждать, пока поток лога освободит место,
+        policy="drop" - отбросить запись и увеличить счетчик dropped
+    """
+
+    def __init__(self, log_queue, policy=LOG_QUEUE_POLICY):
+        if policy not in ("block", "drop"):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        super().__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+
+    def enqueue(self, record):
+        if self.policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchQueueListener:
+    """
+        Поток, который забирает записи из очереди пачками до
+        batch_size штук, раздает их файловым обработчикам по имени
+        логгера и сбрасывает файлы один раз на пачку
+    """
+
+    _sentinel = None
+
+    def __init__(self, log_queue, routes, batch_size=LOG_BATCH_SIZE):
+        self.queue = log_queue
+        self.routes = {logger.name: file_handler for logger, file_handler in routes.items()}
+        self.batch_size = batch_size
+        self.thread = None
+
+    def start(self):
+        for file_handler in self.routes.values():
+            file_handler.batching = True
+        self.thread = threading.Thread(target=self.monitor, name="patient-log", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.queue.put(self._sentinel)
+        self.thread.join()
+        self.thread = None
+        for file_handler in self.routes.values():
+            file_handler.batching = False
+            file_handler.flush()
+
+    def monitor(self):
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if self._sentinel in batch:
+                # всё, что пришло до остановки, еще нужно записать
+                batch = batch[:batch.index(self._sentinel)]
+                running = False
+            self.handle(batch)
+
+    def handle(self, batch):
+        touched = set()
+        for record in batch:
+            file_handler = self.routes.get(record.name)
+            if file_handler is not None and record.levelno >= file_handler.level:
+                file_handler.handle(record)
+                touched.add(file_handler)
+        for file_handler in touched:
+            file_handler.flush_batch()
+
+
+queue_handler = None
+listener = None
+
+
+def enable_async_logging(queue_size=LOG_QUEUE_SIZE, batch_size=LOG_BATCH_SIZE, policy=LOG_QUEUE_POLICY):
+    """
+        Переключает логгеры на запись через очередь и отдельный
+        поток. Запись лога больше не ждет диска, кроме случая
+        переполненной очереди с policy="block"
+    """
+    global queue_handler, listener
+    if listener is not None:
+        return queue_handler
+    log_queue = queue.Queue(queue_size)
+    queue_handler = BoundedQueueHandler(log_queue, policy)
+    listener = BatchQueueListener(log_queue, ROUTES, batch_size)
+    listener.start()
+    for logger, file_handler in ROUTES.items():
+        logger.removeHandler(file_handler)
+        logger.addHandler(queue_handler)
+    return queue_handler
+
+
+def shutdown_logging():
+    """
+        Дописывает накопленные записи, останавливает поток лога
+        и возвращает логгерам синхронные файловые обработчики
+    """
+    global queue_handler, listener
+    if listener is None:
+        return
+    for logger, file_handler in ROUTES.items():
+        logger.removeHandler(queue_handler)
+        logger.addHandler(file_handler)
+    listener.stop()
+    queue_handler = listener = None
+
+
+def detach_async_logging():
+    """
+        Для дочерних процессов (initializer пула): очередь и флаги
+        пакетной записи достались от родителя, а потока лога в
+        процессе нет, и запись в полную очередь ждала бы вечно.
+        Возвращает логгерам синхронные файловые обработчики,
+        не останавливая чужой поток
+    """
+    global queue_handler, listener
+    if listener is None:
+        return
+    for logger, file_handler in ROUTES.items():
+        logger.removeHandler(queue_handler)
+        logger.addHandler(file_handler)
+        file_handler.batching = False
+    queue_handler = listener = None
+
+
+atexit.register(shutdown_logging)
+
+if ASYNC_LOGGING:
+    enable_async_logging()
@@ -0,0 +1,287 @@
+"""
+    Необязательные замеры горячих путей: проверка полей
+    дескрипторами, чтение коллекции, сохранение и запись логов.
+
+    enable() подменяет методы классов обертками с замером времени,
+    disable() возвращает исходные, поэтому в выключенном состоянии
+    замеры ничего не стоят.
+
+    Время измеряется у каждого METRICS_SAMPLE_RATE-го вызова (для
+    проверки полей - отдельно по каждому полю), count гистограмм -
+    число замеренных вызовов. Отказы дескрипторов и прочитанные
+    строки считаются точно, строки копятся в обертке и попадают в
+    counters при чтении метрик. Счетчики обновляются без
+    блокировок, при записи из нескольких потоков значения
+    приблизительные.
+
+    Цена включенных замеров - лишний вызов обертки на каждую
+    проверку поля, запись лога и строку коллекции, около 0.25 мкс
+    на вызов: 15-20 % к созданию Patient и строгой загрузке
+    коллекции (шесть проверок на строку), около 6 % к загрузке
+    с trusted=True.
+
+        from homework import metrics
+        metrics.enable()
+        ...
+        metrics.snapshot()
+        print(metrics.prometheus_text())
+"""
+import functools
+import time
+from bisect import bisect_left
+
+from homework.config import METRICS_SAMPLE_RATE
+
+# границы корзин гистограмм задержек, секунды
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                   1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0)
+
+HELP = {
+    "patient_validation_seconds": "Время проверки поля дескриптором",
+    "patient_rejections_total": "Значения, отклоненные дескриптором",
+    "patient_save_seconds": "Время Patient.save",
+    "patient_writer_flush_seconds": "Время записи пачки PatientWriter",
+    "log_write_seconds": "Время записи строки лога в файл",
+    "collection_rows_read_total": "Строки, прочитанные CollectionIterator",
+    "collection_read_seconds_total": "Время внутри CollectionIterator.__next__",
+}
+
+
+class Histogram:
+    """Число наблюдений по корзинам LATENCY_BUCKETS, сумма и количество"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total, result = 0, []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q):
+        """Верхняя граница корзины, в которую попадает квантиль q"""
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return float("inf")
+
+
+# метрики по ключу (имя, значение метки)
+histograms = {}
+counters = {}
+LABELS = {"patient_validation_seconds": "field", "patient_rejections_total": "field",
+          "log_write_seconds": "logger"}
+patched = []
+# счетчики оберток CollectionIterator.__next__: [строк всего, уже учтено в counters]
+reads = []
+
+
+def histogram(name, label=None):
+    key = (name, label)
+    if key not in histograms:
+        histograms[key] = Histogram()
+    return histograms[key]
+
+
+def increment(name, label=None, value=1):
+    key = (name, label)
+    counters[key] = counters.get(key, 0) + value
+
+
+def patch(owner, attribute, wrapper):
+    original = getattr(owner, attribute)
+    # унаследованный метод при выключении просто удаляется из класса
+    patched.append((owner, attribute, owner.__dict__.get(attribute)))
+    setattr(owner, attribute, functools.wraps(original)(wrapper(original)))
+
+
+def timed_set(original, rate=METRICS_SAMPLE_RATE):
+    clock = time.perf_counter
+    # счетчик на поле: общий на класс дескриптора при четном rate
+    # замерял бы одни и те же поля из фиксированного порядка
+    calls = {}
+
+    def __set__(self, instance, value):
+        name = self.name
+        calls[name] = count = calls.get(name, 0) + 1
+        if count % rate:
+            try:
+                return original(self, instance, value)
+            except (TypeError, ValueError, AttributeError):
+                increment("patient_rejections_total", self.name)
+                raise
+        start = clock()
+        try:
+            original(self, instance, value)
+        except (TypeError, ValueError, AttributeError):
+            increment("patient_rejections_total", self.name)
+            raise
+        finally:
+            histogram("patient_validation_seconds", self.name).observe(clock() - start)
+    return __set__
+
+
+def timed(name):
+    clock = time.perf_counter
+
+    def wrapper(original):
+        def method(*args, **kwargs):
+            start = clock()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                histogram(name).observe(clock() - start)
+        return method
+    return wrapper
+
+
+def timed_emit(original, rate=METRICS_SAMPLE_RATE):
+    clock = time.perf_counter
+    calls = [0]
+
+    def emit(self, record):
+        calls[0] += 1
+        if calls[0] % rate:
+            return original(self, record)
+        start = clock()
+        try:
+            original(self, record)
+        finally:
+            histogram("log_write_seconds", record.name).observe(clock() - start)
+    return emit
+
+
+def counted_next(original, rate=METRICS_SAMPLE_RATE):
+    clock = time.perf_counter
+    calls = [0, 0]
+    reads.append(calls)
+
+    def __next__(self):
+        calls[0] += 1
+        if calls[0] % rate:
+            try:
+                return original(self)
+            except StopIteration:
+                calls[0] -= 1
+                raise
+        start = clock()
+        try:
+            return original(self)
+        except StopIteration:
+            calls[0] -= 1
+            raise
+        finally:
+            # время одного вызова из rate - оценка для всех rate строк
+            increment("collection_read_seconds_total", value=(clock() - start) * rate)
+    return __next__
+
+
+def collect_reads():
+    """Переносит накопленные обертками строки в counters"""
+    for calls in reads:
+        if calls[0] != calls[1]:
+            increment("collection_rows_read_total", value=calls[0] - calls[1])
+            calls[1] = calls[0]
+
+
+def enabled():
+    return bool(patched)
+
+
+def enable(sample_rate=METRICS_SAMPLE_RATE):
+    """
+        Включает замеры, повторный вызов ничего не меняет.
+        sample_rate=1 - замерять время каждого вызова
+    """
+    if patched:
+        return
+    from homework.logger import BatchFileHandler
+    from homework.patient import StringDescriptor, DateDescriptor, PhoneDescriptor, DocDescriptor, \
+        Patient, PatientWriter, CollectionIterator
+    for descriptor in (StringDescriptor, DateDescriptor, PhoneDescriptor, DocDescriptor):
+        patch(descriptor, "__set__", functools.partial(timed_set, rate=sample_rate))
+    patch(Patient, "save", timed("patient_save_seconds"))
+    patch(PatientWriter, "flush", timed("patient_writer_flush_seconds"))
+    patch(BatchFileHandler, "emit", functools.partial(timed_emit, rate=sample_rate))
+    patch(CollectionIterator, "__next__", functools.partial(counted_next, rate=sample_rate))
+
+
+def disable():
+    """Возвращает исходные методы, накопленные значения остаются до reset()"""
+    while patched:
+        owner, attribute, original = patched.pop()
+        if original is None:
+            delattr(owner, attribute)
+        else:
+            setattr(owner, attribute, original)
+    collect_reads()
+    reads.clear()
+
+
+def reset():
+    for calls in reads:
+        calls[1] = calls[0]
+    histograms.clear()
+    counters.clear()
+
+
+def snapshot():
+    """
+        Текущие значения: счетчики, гистограммы с count, sum, p50 и
+        p99 (граница корзины) и скорость чтения коллекции в строках
+        в секунду
+    """
+    collect_reads()
+    result = {"counters": {}, "histograms": {}}
+    for (name, label), value in counters.items():
+        result["counters"].setdefault(name, {})[label] = value
+    for (name, label), item in histograms.items():
+        result["histograms"].setdefault(name, {})[label] = {
+            "count": item.count, "sum": item.sum,
+            "p50": item.quantile(0.5), "p99": item.quantile(0.99),
+        }
+    seconds = counters.get(("collection_read_seconds_total", None), 0)
+    rows = counters.get(("collection_rows_read_total", None), 0)
+    result["collection_rows_per_second"] = rows / seconds if seconds else 0.0
+    return result
+
+
+def labels(name, label, extra=""):
+    pairs = [f'{LABELS[name]}="{label}"'] if label is not None else []
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def prometheus_text():
+    """Метрики в текстовом формате Prometheus"""
+    collect_reads()
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        lines += [f"# HELP {name} {HELP[name]}", f"# TYPE {name} counter"]
+        for (key, label), value in sorted(counters.items(), key=lambda item: str(item[0])):
+            if key == name:
+                lines.append(f"{name}{labels(name, label)} {value}")
+    for name in sorted({name for name, _ in histograms}):
+        lines += [f"# HELP {name} {HELP[name]}", f"# TYPE {name} histogram"]
+        for (key, label), item in sorted(histograms.items(), key=lambda item: str(item[0])):
+            if key != name:
+                continue
+            for bound, total in item.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                extra = 'le="' + le + '"'
+                lines.append(f"{name}_bucket{labels(name, label, extra)} {total}")
+            lines.append(f"{name}_sum{labels(name, label)} {item.sum}")
+            lines.append(f"{name}_count{labels(name, label)} {item.count}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,62 @@
+import re
+
+# лучше вместо глобальных констант, создать структуры с интерфейсом
+# обновления элементов и форматов
+OPERATORS_CODE = {900, 901, 902, 903, 904, 905, 906, 908, 909, 910,
+                  911, 912, 913, 914, 915, 916, 917, 918, 919, 920,
+                  921, 922, 923, 924, 925, 926, 927, 928, 929, 930,
+                  931, 932, 933, 934, 936, 937, 938, 939, 941, 950,
+                  951, 952, 953, 954, 955, 956, 958, 960, 961, 962,
+                  963, 964, 965, 966, 967, 968, 969, 970, 971, 977,
+                  978, 980, 981, 982, 983, 984, 985, 986, 987, 988,
+                  989, 991, 992, 993, 994, 995, 996, 997, 999}
+
+INAPROPRIATE_SYMBOLS = r"[a-zA-Z\u0400-\u04FF.!@?#$%&:;*\,\;\=[\\\]\^_{|}<>]"
+
+# шаблоны компилируются один раз при импорте
+BAD_SYMBOLS_PATTERN = re.compile(INAPROPRIATE_SYMBOLS)
+NOT_DIGITS_PATTERN = re.compile(r"\D+")
+
+# разделители, которые встречаются в телефонах и номерах документов
+SEPARATORS = str.maketrans("", "", " -()+/")
+
+
+def extract_digits(value):
+    """
+        Цифры из строки одной строкой или None, если в ней есть
+        недопустимые символы.
+
+        Обычный случай (цифры и разделители) разбирается одним
+        проходом str.translate, регулярные выражения нужны только
+        для строк с прочими символами
+    """
+    digits = value.translate(SEPARATORS)
+    if digits.isdecimal():
+        return digits
+    if BAD_SYMBOLS_PATTERN.search(value) is not None:
+        return None
+    return NOT_DIGITS_PATTERN.sub("", value)
+
+
+def normalize_phone(number):
+    """Телефон в формате 8xxxxxxxxxx или None"""
+    digits = extract_digits(number)
+    if digits is None or len(digits) != 11:
+        return None
+    if int(digits[1:4]) not in OPERATORS_CODE:
+        return None
+    return "8" + digits[1:]
+
+
+def normalize_phones(numbers):
+    """Пакетная нормализация телефонов для импорта, None на месте неверных"""
+    normalize = normalize_phone
+    return [normalize(number) for number in numbers]
+
+
+def normalize_document_id(number, fix_size):
+    """Номер документа из fix_size цифр или None"""
+    digits = extract_digits(number)
+    if digits is None or len(digits) != fix_size:
+        return None
+    return digits
@@ -0,0 +1,206 @@
+import copy
+import csv
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from homework.config import IMPORT_CHUNK_SIZE, IMPORT_REPORT_SUFFIX, SCAN_CHUNK_SIZE
+from homework.logger import logger_info, detach_async_logging
+from homework.storage import append_rows
+
+ImportResult = namedtuple("ImportResult", ["accepted", "rejected", "report"])
+
+
+def byte_ranges(path, parts):
+    """
+        Делит файл на не больше чем parts диапазонов [start, end),
+        границы сдвинуты на начало следующей строки
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as table:
+        for i in range(1, parts):
+            position = size * i // parts
+            if position <= bounds[-1]:
+                continue
+            table.seek(position - 1)
+            position += len(table.readline()) - 1
+            if bounds[-1] < position < size:
+                bounds.append(position)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def chunk_ranges(path, workers, chunk_size=IMPORT_CHUNK_SIZE):
+    size = os.path.getsize(path)
+    return byte_ranges(path, max(workers, -(-size // chunk_size)))
+
+
+def read_range(path, start, end):
+    return [line.decode("utf-8") for line in read_raw_range(path, start, end)]
+
+
+def read_raw_range(path, start, end):
+    with open(path, "rb") as table:
+        table.seek(start)
+        return table.read(end - start).split(b"\n")
+
+
+def ordered_map(function, tasks, workers, ordered=True):
+    """
+        Результаты function(*task) в порядке задач. В работе
+        одновременно не больше 2 * workers задач, поэтому память
+        не растет с размером файла. workers=1 - без процессов.
+        ordered=False - результаты по мере готовности
+    """
+    if workers == 1:
+        for task in tasks:
+            yield function(*task)
+        return
+    if not ordered:
+        yield from unordered_map(function, tasks, workers)
+        return
+    with ProcessPoolExecutor(workers, initializer=detach_async_logging) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(function, *task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def unordered_map(function, tasks, workers):
+    with ProcessPoolExecutor(workers, initializer=detach_async_logging) as executor:
+        pending = set()
+        for task in tasks:
+            pending.add(executor.submit(function, *task))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def range_patients(path, start, end, trusted=False, lazy=False):
+    """
+        Пациенты из строк диапазона, пустые строки пропускаются.
+        Диапазоны кончаются переводом строки, кроме последнего:
+        хвост без перевода строки - недописанная строка, и он
+        отбрасывается, как в CollectionIterator
+    """
+    from homework.patient import patient_from_line
+
+    for line in read_range(path, start, end)[:-1]:
+        line = line.rstrip("\r")
+        if line:
+            yield patient_from_line(line, trusted, lazy)
+
+
+def map_range(path, start, end, function, trusted=False, lazy=False):
+    return [function(patient) for patient in range_patients(path, start, end, trusted, lazy)]
+
+
+def reduce_range(path, start, end, function, initial, trusted=False, lazy=False):
+    result = copy.deepcopy(initial)
+    for patient in range_patients(path, start, end, trusted, lazy):
+        result = function(result, patient)
+    return result
+
+
+def parallel_map(path, function, workers=None, ordered=True, trusted=False, lazy=False,
+                 chunk_size=SCAN_CHUNK_SIZE):
+    """
+        function(patient) для каждой строки файла в процессах.
+        Файл делится на куски по границам строк, каждый кусок
+        разбирается в процессе целиком, а результаты возвращаются
+        списком на кусок и отдаются по одному. function должна
+        передаваться через pickle (функция уровня модуля).
+        ordered=False - куски в порядке готовности
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = ((path, start, end, function, trusted, lazy)
+             for start, end in chunk_ranges(path, workers, chunk_size))
+    for results in ordered_map(map_range, tasks, workers, ordered):
+        yield from results
+
+
+def parallel_reduce(path, function, combine, initial, workers=None, trusted=False, lazy=False,
+                    chunk_size=SCAN_CHUNK_SIZE):
+    """
+        Свертка файла в процессах: каждый кусок сворачивается
+        function(result, patient) от копии initial, частичные
+        результаты объединяются combine(result, part) по мере
+        готовности
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = ((path, start, end, function, initial, trusted, lazy)
+             for start, end in chunk_ranges(path, workers, chunk_size))
+    result = copy.deepcopy(initial)
+    for part in ordered_map(reduce_range, tasks, workers, ordered=False):
+        result = combine(result, part)
+    return result
+
+
+def validate_range(path, start, end):
+    """
+        Проверка строк диапазона через дескрипторы Patient.
+        Возвращает нормализованные строки для csv, отклоненные
+        строки (номер строки в куске, строка, причина) и число строк.
+        Пустые строки пропускаются.
+
+        В чужом файле ровно шесть полей: ключи записей выдаются при
+        импорте заново, ключ из файла мог бы перезаписать чужого
+        пациента
+    """
+    from homework.patient import Patient
+
+    accepted, rejected = [], []
+    lines = read_raw_range(path, start, end)
+    if lines and lines[-1] == b"":
+        lines.pop()
+    for number, raw in enumerate(lines):
+        raw = raw.rstrip(b"\r")
+        if not raw:
+            continue
+        # строка в отчете сохраняется и с битой кодировкой
+        line = raw.decode("utf-8", "replace")
+        try:
+            fields = raw.decode("utf-8").split(",")
+            if len(fields) != 6:
+                raise ValueError(f"Expected 6 fields, got {len(fields)}")
+            patient = Patient(*fields)
+        except (TypeError, ValueError, AttributeError, KeyError) as error:
+            rejected.append((number, line, str(error)))
+        else:
+            accepted.append(patient.csv_line())
+    return "".join(accepted), len(accepted), rejected, len(lines)
+
+
+def import_csv(source, destination, workers=None, report=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+        Параллельный импорт чужого csv: файл делится на куски по
+        границам строк, куски проверяются в ProcessPoolExecutor,
+        принятые строки дописываются в destination в исходном
+        порядке, отклоненные с причиной - в отчет report
+    """
+    workers = workers or os.cpu_count() or 1
+    report = report or source + IMPORT_REPORT_SUFFIX
+    accepted = rejected = 0
+    line_offset = 0
+    tasks = ((source, start, end) for start, end in chunk_ranges(source, workers, chunk_size))
+    with open(report, "w", encoding="utf-8", newline="") as report_file:
+        writer = csv.writer(report_file)
+        writer.writerow(["line", "reason", "row"])
+        for rows, chunk_accepted, errors, count in ordered_map(validate_range, tasks, workers):
+            append_rows(destination, rows)
+            logger_info.info(f"Patients were imported: {chunk_accepted}")
+            for number, line, reason in errors:
+                writer.writerow([line_offset + number + 1, reason, line])
+            accepted += chunk_accepted
+            rejected += len(errors)
+            line_offset += count
+    return ImportResult(accepted, rejected, report)
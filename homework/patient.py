@@ -1,26 +1,19 @@
 from abc import ABC, abstractmethod
-from dateutil.parser import parse
-import regex as re
-import logging
+import importlib
+import itertools
 import os
-from homework.logger import logger_error, logger_info, handler, handler_error
-
-from homework.config import PHONE_FORMAT, DRIVER_LICENSE_TYPE, DRIVER_LICENSE_FORMAT, PASSPORT_TYPE
-
-# лучше вместо глобальных констант, создать структуры с интерфейсом
-# обновления элементов и форматов
-OPERATORS_CODE = {900, 901, 902, 903, 904, 905, 906, 908, 909, 910,
-                  911, 912, 913, 914, 915, 916, 917, 918, 919, 920,
-                  921, 922, 923, 924, 925, 926, 927, 928, 929, 930,
-                  931, 932, 933, 934, 936, 937, 938, 939, 941, 950,
-                  951, 952, 953, 954, 955, 956, 958, 960, 961, 962,
-                  963, 964, 965, 966, 967, 968, 969, 970, 971, 977,
-                  978, 980, 981, 982, 983, 984, 985, 986, 987, 988,
-                  989, 991, 992, 993, 994, 995, 996, 997, 999}
+import logging
+from homework.dates import parse_date
+from homework.index import LineIndex, FieldIndex
+from homework.storage import append_rows, open_append, write_locked, locked, replace_file, pack_record, iter_records
+from homework.documents import document_types
+from homework.normalizer import OPERATORS_CODE, INAPROPRIATE_SYMBOLS, normalize_phone, \
+    extract_digits
+from homework.logger import logger_error, logger_info
 
-DOC_TYPE = {"паспорт": 10, "заграничный паспорт": 9,
-            "водительское удостоверение": 10}
-INAPROPRIATE_SYMBOLS = r"[a-zA-Z\u0400-\u04FF.!@?#$%&:;*\,\;\=[\\\]\^_{|}<>]"
+from homework.config import PHONE_FORMAT, DRIVER_LICENSE_TYPE, DRIVER_LICENSE_FORMAT, PASSPORT_TYPE, \
+    CSV_PATH, SAVE_BATCH_SIZE, READ_CHUNK_SIZE, IMPORT_CHUNK_SIZE, STORAGE_BACKEND, BINARY_PATH, \
+    SQLITE_PATH, DEDUP_PARTITIONS, SCAN_CHUNK_SIZE
 
 
 class BaseDescriptor(ABC):
@@ -33,7 +26,12 @@ class BaseDescriptor(ABC):
         self.value = None
 
     def __get__(self, instance, owner):
-        return instance.__dict__[self.name]
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            return instance.resolve(self.name)
 
     @staticmethod
     def check_type(value):
@@ -80,16 +78,18 @@ class StringDescriptor(BaseDescriptor):
 class DateDescriptor(BaseDescriptor):
     """
        Дата имеет тип datetime.
+       Разбор идет через parse_date: быстрый путь для ISO
+       формата и кэш уже разобранных строк.
        Исключения логгируем в errors
     """
 
     def __set__(self, instance, value):
         self.check_type(value)
-        if self.check_date(value):
-            tmp = parse(value)
+        date, status = self.check_date(value)
+        if status:
             if self.name in instance.__dict__:
                 logger_info.info(f"Date was changed ")
-            instance.__dict__[self.name] = tmp
+            instance.__dict__[self.name] = date
 
         else:
             logger_error.error(f"Invalid date: {value}")
@@ -98,10 +98,9 @@ class DateDescriptor(BaseDescriptor):
     @staticmethod
     def check_date(value):
         try:
-            parse(value)
+            return parse_date(value), True
         except ValueError:
-            return False
-        return True
+            return None, False
 
 
 class PhoneDescriptor(BaseDescriptor):
@@ -123,16 +122,8 @@ class PhoneDescriptor(BaseDescriptor):
 
     @staticmethod
     def check_phone(number):
-        parsed_num = re.findall(r"\d+", number)
-        res = "8"
-        res += ''.join(parsed_num)[1:]
-        if len(res) != 11:
-            return None, False
-        if int(res[1:4]) not in OPERATORS_CODE:
-            return None, False
-        if re.search(INAPROPRIATE_SYMBOLS, number) is not None:
-            return None, False
-        return res, True
+        res = normalize_phone(number)
+        return res, res is not None
 
 
 class DocDescriptor(BaseDescriptor):
@@ -145,7 +136,7 @@ class DocDescriptor(BaseDescriptor):
 
         if self.name == "document_id":
             self.check_type(value)
-            res, status = self.check_id(value, DOC_TYPE[instance.document_type])
+            res, status = self.check_id(value, instance.document_type)
             if status:
                 if self.name in instance.__dict__:
                     logger_info.info("ID was changed")
@@ -165,20 +156,13 @@ class DocDescriptor(BaseDescriptor):
                 raise ValueError("Invalid document")
 
     @staticmethod
-    def check_id(number, fix_size):
-        parsed_num = re.findall(r"\d+", number)
-        res = ''.join(parsed_num)
-        if len(res) != fix_size:
-            return None, False
-        if re.search(INAPROPRIATE_SYMBOLS, number) is not None:
-            return None, False
-        return res, True
+    def check_id(number, doc_type):
+        res = document_types.normalize(doc_type, number)
+        return res, res is not None
 
     @staticmethod
     def check_doc(doc_type):
-        if str.lower(doc_type) not in DOC_TYPE:
-            return False
-        return True
+        return doc_type in document_types
 
 
 def my_logging_decorator(method):
@@ -221,6 +205,9 @@ class Patient:
     document_type = DocDescriptor()
     document_id = DocDescriptor()
 
+    FIELDS = ("first_name", "last_name", "birth_date", "phone",
+              "document_type", "document_id")
+
     logger_info = logging.getLogger("Patient")
     logger_error = logging.getLogger("Error")
 
@@ -241,44 +228,293 @@ class Patient:
         return Patient(first_name, last_name, birth_date, phone,
                        document_type, document_id)
 
+    @staticmethod
+    def add_document_type(name, size=None, pattern=None, normalizer=None):
+        """
+            Новый тип документа, например карантинный пропуск:
+            Patient.add_document_type("пропуск", pattern=r"[0-9]{2}[a-z]{4}",
+            normalizer=str.lower)
+        """
+        return document_types.register(name, size, pattern, normalizer)
+
+    def csv_line(self):
+        return u",".join(map(str, self.values())) + u"," + self.key + u"\n"
+
+    @classmethod
+    def from_trusted_row(cls, row):
+        """
+            Создание пациента из строки нашего csv без повторных
+            проверок: поля уже проверены и нормализованы при
+            сохранении, дата хранится как str(datetime) и
+            разбирается быстрым путем parse_date
+        """
+        first_name, last_name, birth_date, phone, document_type, document_id, *key = row
+        return cls.restore(first_name, last_name, parse_date(birth_date),
+                           phone, document_type, document_id, *key)
+
+    @classmethod
+    def restore(cls, first_name, last_name, birth_date, phone,
+                document_type, document_id, key=None):
+        """
+            Восстановление уже проверенного пациента из хранилища,
+            birth_date - готовый datetime
+        """
+        patient = cls.__new__(cls)
+        patient.__dict__.update(first_name=first_name, last_name=last_name,
+                                birth_date=birth_date, phone=phone,
+                                document_type=document_type,
+                                document_id=document_id)
+        if key:
+            patient.__dict__["key"] = key
+        return patient
+
+    @property
+    def key(self):
+        """
+            Постоянный ключ записи пациента. Выдается при первом
+            сохранении и пишется вместе с каждой версией записи,
+            при чтении побеждает последняя версия с этим ключом
+        """
+        if "key" not in self.__dict__:
+            from uuid import uuid4
+            self.__dict__["key"] = uuid4().hex
+        return self.__dict__["key"]
+
+    def resolve(self, name):
+        raise AttributeError(name)
+
+    def values(self):
+        return (self.first_name, self.last_name, self.birth_date,
+                self.phone, self.document_type, self.document_id)
+
     @my_logging_decorator
     def save(self):
-        data = [self.first_name, self.last_name, self.birth_date,
-                self.phone, self.document_type, self.document_id]
-        with open("table.csv", "a", encoding="utf-8") as table:
-            table.write(u",".join(map(str, data)) + u"\n")
+        open_collection().append([self])
 
-    def __del__(self):
-        handler.close()
-        handler_error.close()
+    async def save_async(self):
+        """
+            Запись в хранилище STORAGE_BACKEND через общего
+            писателя цикла событий, см. homework.aio
+        """
+        from homework.aio import save_patient
+        await save_patient(self)
+
+
+class LazyPatient(Patient):
+    """
+        Пациент поверх сырой строки csv. Поле разбирается и
+        проверяется своим дескриптором при первом чтении и дальше
+        берется из __dict__, поэтому фильтр по одному полю не
+        платит за разбор даты, телефона и имен.
+
+        Ошибка в поле строгого режима поднимается при его чтении,
+        а не при создании объекта
+    """
+
+    def __init__(self, line, trusted=False):
+        row = line.split(",")
+        if len(row) not in (6, 7):
+            raise TypeError(f"Wrong number of fields: {len(row)}")
+        self.__dict__["row"] = row
+        self.__dict__["trusted"] = trusted
+        if len(row) == 7 and row[6]:
+            self.__dict__["key"] = row[6]
+
+    def __setattr__(self, name, value):
+        if name in self.FIELDS and name not in self.__dict__:
+            self.resolve(name)
+        super().__setattr__(name, value)
+
+    def resolve(self, name):
+        raw = self.row[self.FIELDS.index(name)]
+        if not self.trusted:
+            vars(Patient)[name].__set__(self, raw)
+        elif name == "birth_date":
+            self.__dict__[name] = parse_date(raw)
+        else:
+            self.__dict__[name] = raw
+        return self.__dict__[name]
+
+
+class PatientWriter:
+    """
+        Пакетная запись пациентов в csv.
+        Держит один открытый файл на всё время работы,
+        копит строки в буфере и сбрасывает их на диск
+        каждые batch_size записей одной записью под блокировкой.
+
+        В лог info пишется одна запись на каждый сброс,
+        а не на каждого пациента
+    """
+
+    def __init__(self, path=CSV_PATH, batch_size=SAVE_BATCH_SIZE):
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        self.path = path
+        self.batch_size = batch_size
+        self.buffer = []
+        self.saved = 0
+        self.table = None
+
+    def __enter__(self):
+        self.table = open_append(self.path)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.flush()
+        finally:
+            os.close(self.table)
+            self.table = None
+
+    def write(self, patient):
+        self.buffer.append(patient.csv_line())
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, patients):
+        for patient in patients:
+            self.write(patient)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        data = u"".join(self.buffer)
+        while not write_locked(self.table, data, self.path):
+            # файл заменили через compact, пишем уже в новый
+            os.close(self.table)
+            self.table = open_append(self.path)
+        logger_info.info(f"Patients were saved: {len(self.buffer)}")
+        self.saved += len(self.buffer)
+        self.buffer.clear()
+
+
+def patient_from_line(line, trusted=False, lazy=False):
+    if lazy:
+        return LazyPatient(line, trusted)
+    row = line.split(",")
+    if trusted:
+        return Patient.from_trusted_row(row)
+    # строки, сохраненные до появления ключей, состоят из 6 полей
+    key = row.pop() if len(row) == 7 else None
+    patient = Patient(*row)
+    if key:
+        patient.__dict__["key"] = key
+    return patient
+
+
+def raw_matcher(name, value, trusted=False):
+    """
+        Проверка сырого значения поля на равенство value. Строки
+        нашего csv уже нормализованы и сравниваются как текст,
+        в строгом режиме несовпавший текст еще нормализуется.
+        Неверному телефону или номеру документа не подходит
+        ни одна строка
+    """
+    if name == "document_type":
+        target = value.lower()
+        return lambda raw: raw.lower() == target
+    if name == "birth_date":
+        target = str(parse_date(value))
+        normalize = lambda raw: str(parse_date(raw))
+    elif name == "phone":
+        target = normalize_phone(value)
+        normalize = normalize_phone
+    elif name == "document_id":
+        target = extract_digits(value)
+        normalize = extract_digits
+    else:
+        target = value
+        normalize = None
+    if target is None:
+        # иначе None совпадет с неверными строками, которые тоже не нормализуются
+        return lambda raw: False
+    if trusted or normalize is None:
+        return lambda raw: raw == target
+
+    def match(raw):
+        if raw == target:
+            return True
+        try:
+            return normalize(raw) == target
+        except ValueError:
+            return False
+    return match
+
+
+def line_key(line):
+    """Ключ записи из строки csv, None для строк без ключа"""
+    row = line.split(",")
+    return row[6] if len(row) == 7 and row[6] else None
 
 
 class CollectionIterator:
+    """
+        Потоковое чтение csv крупными блоками по READ_CHUNK_SIZE байт.
+        Строки разбираются из буфера, а файл дочитывается только
+        когда в буфере не осталось полной строки. Поэтому строки,
+        дописанные в файл во время итерации, тоже попадут в выборку.
+        Строка без перевода строки в конце файла считается
+        недописанной и отдается, только когда ее допишут.
+        Перед дочитыванием размер файла сверяется с позицией
+        чтения: если файл обрезали, буфер со старыми данными
+        сбрасывается и итерация заканчивается (truncated).
+
+        offset - смещение в файле начала следующей строки
+        trusted - строки из нашего csv, пациенты создаются
+            через Patient.from_trusted_row без проверок
+        lazy - отдавать LazyPatient, поля разбираются при чтении
+    """
 
-    def __init__(self, path, limit=None):
-        self.collection = open(path, "r", encoding="utf-8")
+    def __init__(self, path, limit=None, offset=0, chunk_size=READ_CHUNK_SIZE,
+                 trusted=False, lazy=False):
+        self.collection = open(path, "rb")
+        if offset:
+            self.collection.seek(offset)
         self.limit = limit
         self.line = 0
+        self.offset = offset
+        self.chunk_size = chunk_size
+        self.trusted = trusted
+        self.lazy = lazy
+        self.buffer = b""
+        self.position = 0
+        self.truncated = False
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        if self.has_more():
-            params = self.collection.readline()
-            self.line += 1
-            return Patient(*params.split(","))
-        else:
+        params = self.next_line()
+        if params is None:
             raise StopIteration()
+        return patient_from_line(params, self.trusted, self.lazy)
+
+    def next_line(self):
+        if not self.has_more():
+            return None
+        end = self.buffer.find(b"\n", self.position) + 1
+        line = self.buffer[self.position:end]
+        self.position = end
+        self.offset += len(line)
+        self.line += 1
+        return line.rstrip(b"\r\n").decode("utf-8")
 
     def has_more(self):
-        if self.line == self.limit:
-            return False
-        if self.collection.tell() != os.fstat(
-                self.collection.fileno()).st_size:
-            return True
-        else:
+        if self.line == self.limit or self.truncated:
             return False
+        while self.buffer.find(b"\n", self.position) == -1:
+            if os.fstat(self.collection.fileno()).st_size < self.collection.tell():
+                # хвост буфера из обрезанного файла склеился бы с новыми строками
+                self.buffer, self.position = b"", 0
+                self.truncated = True
+                return False
+            chunk = self.collection.read(self.chunk_size)
+            if not chunk:
+                return False
+            self.buffer = self.buffer[self.position:] + chunk
+            self.position = 0
+        return True
 
     def __del__(self):
         self.collection.close()
@@ -288,13 +524,297 @@ class PatientCollection:
     """Берет данные из csv файла, поддерживает итерацию
        ссодержит метод limit, возвращаюший итератор/генератор
        первых n записей
+
+       save_many пишет пачку пациентов через один PatientWriter
+
+       Индексация collection[i], срезы collection[a:b] и skip(k)
+       работают через LineIndex со смещениями строк, поиск по
+       телефону, документу и фамилии - через FieldIndex, поиск
+       отдает только последние версии записей
+
+       trusted=True - файл пишется только нашим кодом, пациенты
+       загружаются без повторной проверки полей. Для импорта чужих
+       файлов остается строгий режим по умолчанию
+
+       lazy=True - вместо пациентов отдаются LazyPatient, которые
+       разбирают поле при первом обращении. filter(**fields)
+       сравнивает поля с сырым текстом строки еще до создания объекта
+
+       Файл - журнал версий: повторное сохранение пациента дописывает
+       строку с тем же ключом. live() отдает только последние версии,
+       compact() атомарно переписывает файл без устаревших строк.
+       Итерация, индексы и поиск видят все версии до compact()
+    """
+
+    def __init__(self, path, trusted=False, lazy=False):
+        self.path = path
+        self.trusted = trusted
+        self.lazy = lazy
+        self.index = None
+        self.fields = None
+
+    def __iter__(self):
+        return CollectionIterator(self.path, trusted=self.trusted, lazy=self.lazy)
+
+    def __len__(self):
+        return len(self.line_index())
+
+    def __getitem__(self, item):
+        index = self.line_index()
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(index))
+            lines = index.read_lines(start, max(start, stop)) if step > 0 \
+                else index.read_lines(stop + 1, start + 1)[::-1]
+            return [patient_from_line(line, self.trusted, self.lazy)
+                    for line in lines[::abs(step)]]
+        if not isinstance(item, int):
+            raise TypeError("Index must be int or slice")
+        size = len(index)
+        if item < 0:
+            item += size
+        if not 0 <= item < size:
+            raise IndexError("Patient index out of range")
+        line, = index.read_lines(item, item + 1)
+        return patient_from_line(line, self.trusted, self.lazy)
+
+    def line_index(self):
+        if self.index is None:
+            self.index = LineIndex(self.path)
+        return self.index
+
+    def field_index(self):
+        if self.fields is None:
+            self.fields = FieldIndex(self.line_index())
+        return self.fields
+
+    def rows(self, numbers):
+        index = self.line_index()
+        return [patient_from_line(index.read_lines(i, i + 1)[0], self.trusted, self.lazy)
+                for i in numbers]
+
+    def find_by_phone(self, phone):
+        number = normalize_phone(phone)
+        if number is None:
+            return []
+        return self.rows(self.field_index().by_phone(number))
+
+    def find_by_document(self, document_type, document_id):
+        number = document_types.normalize(document_type, document_id)
+        if number is None:
+            return []
+        return self.rows(self.field_index().by_document(document_type, number))
+
+    def find_by_last_name(self, prefix):
+        return self.rows(self.field_index().by_last_name(prefix))
+
+    def filter(self, **fields):
+        """
+            Пациенты с заданными значениями полей, например
+            filter(document_type="паспорт"). Значения нормализуются
+            так же, как при сохранении, и сравниваются с текстом
+            строки, пациент создается только для подходящих строк
+        """
+        unknown = set(fields) - set(Patient.FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        matchers = [(Patient.FIELDS.index(name), raw_matcher(name, value, self.trusted))
+                    for name, value in fields.items()]
+        for line in self.raw_lines():
+            row = line.split(",")
+            if len(row) < 6 or all(match(row[i]) for i, match in matchers):
+                yield patient_from_line(line, self.trusted, self.lazy)
+
+    def raw_lines(self):
+        iterator = CollectionIterator(self.path)
+        line = iterator.next_line()
+        while line is not None:
+            yield line
+            line = iterator.next_line()
+
+    def find_duplicates(self, partitions=DEDUP_PARTITIONS, live=True):
+        """
+            Кластеры пациентов-дублей: одинаковый телефон, документ
+            или фамилия и дата рождения с похожим именем. По
+            умолчанию только по последним версиям записей (live()),
+            иначе устаревшие версии попадут в дубли друг к другу.
+            live=False - по всем строкам файла
+        """
+        from homework.dedup import duplicate_rows
+        for rows in duplicate_rows(self.raw_lines(), partitions,
+                                   os.path.dirname(os.path.abspath(self.path)), live):
+            yield self.rows(rows)
+
+    def limit(self, n):
+        return CollectionIterator(self.path, n, trusted=self.trusted, lazy=self.lazy)
+
+    def to_arrays(self):
+        """Столбцы файла массивами numpy для аналитики, см. PatientArrays"""
+        from homework.analytics import to_arrays
+        return to_arrays(self.path)
+
+    def skip(self, k, n=None):
+        index = self.line_index()
+        size = len(index)
+        if k > size:
+            return CollectionIterator(self.path, 0)
+        offset = index.span(k, k + 1)[0] if k < size else index.end
+        return CollectionIterator(self.path, n, offset, trusted=self.trusted, lazy=self.lazy)
+
+    def writer(self, batch_size=SAVE_BATCH_SIZE):
+        return PatientWriter(self.path, batch_size)
+
+    def save_many(self, patients, batch_size=SAVE_BATCH_SIZE):
+        with self.writer(batch_size) as writer:
+            writer.write_many(patients)
+        return writer.saved
+
+    def append(self, patients):
+        append_rows(self.path, u"".join(patient.csv_line() for patient in patients))
+
+    def latest_versions(self):
+        """Номер строки последней версии для каждого ключа и число прочитанных строк"""
+        latest = {}
+        iterator = CollectionIterator(self.path)
+        line = iterator.next_line()
+        while line is not None:
+            key = line_key(line)
+            if key is not None:
+                latest[key] = iterator.line - 1
+            line = iterator.next_line()
+        return latest, iterator.line
+
+    def live_lines(self, versions=None):
+        for _, line in self.live_rows(versions):
+            yield line
+
+    def live_rows(self, versions=None):
+        """Номера и строки последних версий записей"""
+        latest, count = versions or self.latest_versions()
+        iterator = CollectionIterator(self.path, count)
+        line = iterator.next_line()
+        while line is not None:
+            row = iterator.line - 1
+            key = line_key(line)
+            if key is None or latest[key] == row:
+                yield row, line
+            line = iterator.next_line()
+
+    def live(self):
+        """Пациенты без устаревших версий, побеждает последняя запись"""
+        for line in self.live_lines():
+            yield patient_from_line(line, self.trusted, self.lazy)
+
+    def compact(self):
+        """
+            Переписывает файл без устаревших версий записей.
+            Писатели на время перезаписи ждут блокировки, возвращает
+            число удаленных строк
+        """
+        with locked(self.path):
+            versions = self.latest_versions()
+            kept = [0]
+
+            def lines():
+                for line in self.live_lines(versions):
+                    kept[0] += 1
+                    yield line + u"\n"
+
+            replace_file(self.path, lines())
+            # старые смещения относятся к прежнему файлу
+            self.index = self.fields = None
+        removed = versions[1] - kept[0]
+        logger_info.info(f"Collection was compacted: {removed} rows removed")
+        return removed
+
+    def follow(self, from_offset=0, timeout=None, inotify=True):
+        """
+            Новые строки по мере записи, см. homework.follow.Follower:
+            for patient in collection.follow(from_offset=follower.checkpoint)
+        """
+        from homework.follow import Follower
+        return Follower(self, from_offset, timeout, inotify)
+
+    def parallel_map(self, function, workers=None, ordered=True, chunk_size=SCAN_CHUNK_SIZE):
+        """function(patient) по всем строкам в процессах, см. homework.parallel.parallel_map"""
+        from homework.parallel import parallel_map
+        return parallel_map(self.path, function, workers, ordered, self.trusted, self.lazy, chunk_size)
+
+    def parallel_reduce(self, function, combine, initial, workers=None, chunk_size=SCAN_CHUNK_SIZE):
+        """
+            Свертка всех строк в процессах, например подсчет по
+            операторам: function(counter, patient) для строк,
+            combine(counter, part) для частичных результатов
+        """
+        from homework.parallel import parallel_reduce
+        return parallel_reduce(self.path, function, combine, initial, workers,
+                               self.trusted, self.lazy, chunk_size)
+
+    def import_csv(self, source, workers=None, report=None, chunk_size=IMPORT_CHUNK_SIZE):
+        """
+            Проверка и импорт чужого csv в workers процессов,
+            см. homework.parallel.import_csv
+        """
+        from homework.parallel import import_csv
+        return import_csv(source, self.path, workers, report, chunk_size)
+
+
+class BinaryPatientCollection:
+    """
+        Пациенты в компактном бинарном файле (формат записи описан
+        в homework.storage), чтение через mmap. Поддерживает тот же
+        контракт итерации и limit, что и PatientCollection.
+        Файл пишется только нашим кодом, поэтому поля при чтении
+        повторно не проверяются
     """
 
-    def __init__(self, path):
+    def __init__(self, path=BINARY_PATH):
         self.path = path
 
     def __iter__(self):
-        return CollectionIterator(self.path)
+        return self.limit(None)
 
     def limit(self, n):
-        return CollectionIterator(self.path, n)
+        records = iter_records(self.path) if os.path.exists(self.path) else iter(())
+        return (Patient.restore(*values) for values in itertools.islice(records, n))
+
+    def append(self, patients):
+        append_rows(self.path, b"".join(pack_record(*patient.values(), patient.key) for patient in patients))
+
+    def save_many(self, patients, batch_size=SAVE_BATCH_SIZE):
+        saved = 0
+        patients = iter(patients)
+        while True:
+            batch = list(itertools.islice(patients, batch_size))
+            if not batch:
+                return saved
+            self.append(batch)
+            logger_info.info(f"Patients were saved: {len(batch)}")
+            saved += len(batch)
+
+
+# хранилища с тяжелыми зависимостями указаны строкой и
+# импортируются только при первом использовании
+STORAGES = {"csv": (PatientCollection, CSV_PATH),
+            "binary": (BinaryPatientCollection, BINARY_PATH),
+            "sqlite": ("homework.sqlite.SqlitePatientCollection", SQLITE_PATH)}
+
+
+opened_collections = {}
+
+
+def open_collection(backend=None, path=None):
+    """
+        Коллекция выбранного хранилища, по умолчанию
+        STORAGE_BACKEND из homework/config.py. Коллекции
+        переиспользуются, чтобы Patient.save не открывал
+        заново соединения sqlite и индексы
+    """
+    backend = backend or STORAGE_BACKEND
+    collection, default_path = STORAGES[backend]
+    key = (backend, os.path.abspath(path or default_path))
+    if key not in opened_collections:
+        if isinstance(collection, str):
+            module, name = collection.rsplit(".", 1)
+            collection = getattr(importlib.import_module(module), name)
+        opened_collections[key] = collection(key[1])
+    return opened_collections[key]
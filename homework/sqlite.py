@@ -0,0 +1,183 @@
+import itertools
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from homework.config import SQLITE_PATH, SQLITE_POOL_SIZE, SAVE_BATCH_SIZE
+from homework.dates import parse_date
+from homework.index import FieldIndex
+from homework.logger import logger_info
+from homework.documents import document_types
+from homework.normalizer import normalize_phone
+from homework.patient import Patient
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    id INTEGER PRIMARY KEY,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    birth_date TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    document_type TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    record_key TEXT NOT NULL,
+    last_name_key TEXT NOT NULL,
+    document_key TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS patients_record_key ON patients (record_key);
+CREATE INDEX IF NOT EXISTS patients_phone ON patients (phone);
+CREATE INDEX IF NOT EXISTS patients_document ON patients (document_key);
+CREATE INDEX IF NOT EXISTS patients_last_name ON patients (last_name_key);
+"""
+
+# запросы - константы, sqlite3 держит их подготовленными в кэше соединения
+FIELDS = "first_name, last_name, birth_date, phone, document_type, document_id, record_key"
+# повторное сохранение пациента с тем же ключом обновляет запись на месте
+INSERT = f"""INSERT INTO patients ({FIELDS}, last_name_key, document_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (record_key) DO UPDATE SET birth_date = excluded.birth_date, phone = excluded.phone,
+document_type = excluded.document_type, document_id = excluded.document_id,
+document_key = excluded.document_key"""
+# выборки читаются страницами по id: параметры - последний прочитанный id,
+# параметры условия и размер страницы
+PAGE = "SELECT id, " + FIELDS + " FROM patients WHERE id > ? {} ORDER BY id LIMIT ?"
+SELECT_ALL = PAGE.format("")
+SELECT_PHONE = PAGE.format("AND phone = ?")
+SELECT_DOCUMENT = PAGE.format("AND document_key = ?")
+SELECT_LAST_NAME = PAGE.format("AND last_name_key >= ? AND last_name_key < ?")
+COUNT = "SELECT count(*) FROM patients"
+
+
+class ConnectionPool:
+    """
+        Пул соединений sqlite в режиме WAL: читатели не ждут
+        писателя, соединения создаются по мере надобности,
+        но не больше size
+    """
+
+    def __init__(self, path, size=SQLITE_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self.created = 0
+        self.lock = threading.Lock()
+        self.idle = queue.LifoQueue()
+        with self.connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextmanager
+    def connection(self):
+        try:
+            connection = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                create = self.created < self.size
+                if create:
+                    self.created += 1
+            connection = self.connect() if create else self.idle.get()
+        try:
+            yield connection
+        finally:
+            self.idle.put(connection)
+
+    def close(self):
+        while self.created:
+            self.idle.get().close()
+            self.created -= 1
+
+
+def row_values(patient):
+    return (patient.first_name, patient.last_name, str(patient.birth_date),
+            patient.phone, patient.document_type, patient.document_id, patient.key,
+            patient.last_name.lower(), FieldIndex.document_key(patient.document_type, patient.document_id))
+
+
+def restore(row):
+    first_name, last_name, birth_date, phone, document_type, document_id, key = row
+    return Patient.restore(first_name, last_name, parse_date(birth_date), phone, document_type, document_id, key)
+
+
+class SqlitePatientCollection:
+    """
+        Пациенты в sqlite с индексами по телефону, документу и
+        фамилии. Тот же контракт итерации и limit, что и у
+        PatientCollection, пакетная запись через executemany
+        в одной транзакции. Повторное сохранение пациента с тем
+        же ключом обновляет его строку на месте.
+        Выборки читаются страницами, и соединение возвращается
+        в пул до того, как отдать строки страницы, поэтому
+        недочитанный итератор не держит соединение
+    """
+
+    def __init__(self, path=SQLITE_PATH, pool_size=SQLITE_POOL_SIZE):
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+
+    def __iter__(self):
+        return self.query(SELECT_ALL)
+
+    def __len__(self):
+        with self.pool.connection() as connection:
+            return connection.execute(COUNT).fetchone()[0]
+
+    def limit(self, n):
+        return self.query(SELECT_ALL, limit=n)
+
+    def query(self, sql, parameters=(), limit=None, page_size=SAVE_BATCH_SIZE):
+        last = 0
+        while limit is None or limit > 0:
+            size = page_size if limit is None else min(limit, page_size)
+            with self.pool.connection() as connection:
+                rows = connection.execute(sql, (last, *parameters, size)).fetchall()
+            for row in rows:
+                yield restore(row[1:])
+            if len(rows) < size:
+                return
+            last = rows[-1][0]
+            if limit is not None:
+                limit -= len(rows)
+
+    def append(self, patients):
+        with self.pool.connection() as connection:
+            connection.execute("BEGIN")
+            try:
+                connection.executemany(INSERT, map(row_values, patients))
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def save_many(self, patients, batch_size=SAVE_BATCH_SIZE):
+        saved = 0
+        patients = iter(patients)
+        while True:
+            batch = list(itertools.islice(patients, batch_size))
+            if not batch:
+                return saved
+            self.append(batch)
+            logger_info.info(f"Patients were saved: {len(batch)}")
+            saved += len(batch)
+
+    def find_by_phone(self, phone):
+        number = normalize_phone(phone)
+        if number is None:
+            return []
+        return list(self.query(SELECT_PHONE, (number,)))
+
+    def find_by_document(self, document_type, document_id):
+        number = document_types.normalize(document_type, document_id)
+        if number is None:
+            return []
+        return list(self.query(SELECT_DOCUMENT, (FieldIndex.document_key(document_type, number),)))
+
+    def find_by_last_name(self, prefix):
+        prefix = prefix.lower()
+        return list(self.query(SELECT_LAST_NAME, (prefix, prefix + "\U0010ffff")))
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,196 @@
+import mmap
+import os
+import struct
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+from homework.config import DATE_CACHE_SIZE
+
+from homework.dates import parse_date
+from homework.documents import document_types
+
+try:
+    import fcntl
+except ImportError:  # блокировки fcntl есть только на unix
+    fcntl = None
+
+
+def open_append(path):
+    return os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+
+def is_replaced(fd, path):
+    """Файл по пути path заменили другим (например, при compact)"""
+    try:
+        return os.fstat(fd).st_ino != os.stat(path).st_ino
+    except FileNotFoundError:
+        return True
+
+
+def write_locked(fd, data, path=None):
+    """
+        Дописывает строки в файл под эксклюзивной блокировкой
+        одним os.write, чтобы строки разных процессов не
+        перемешивались. Читатели не отдают строку без перевода
+        строки, поэтому недописанный хвост они просто подождут.
+
+        Если передан path и файл под ним уже заменили, ничего не
+        пишет и возвращает False - нужно открыть файл заново
+    """
+    payload = memoryview(data.encode("utf-8") if isinstance(data, str) else data)
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        if path is not None and is_replaced(fd, path):
+            return False
+        # для обычных файлов запись почти всегда целиком, но
+        # частичную запись под блокировкой можно безопасно дописать
+        while payload:
+            payload = payload[os.write(fd, payload):]
+        return True
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def append_rows(path, data):
+    while True:
+        fd = open_append(path)
+        try:
+            if write_locked(fd, data, path):
+                return
+        finally:
+            os.close(fd)
+
+
+@contextmanager
+def locked(path):
+    """Эксклюзивная блокировка файла, писатели ждут ее снятия"""
+    fd = open_append(path)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def replace_file(path, lines):
+    """
+        Атомарная перезапись: строки пишутся во временный файл
+        рядом с path, который затем подменяет path через os.replace.
+        Вызывать под locked(path), иначе строки, дописанные во
+        время перезаписи, потеряются
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as table:
+            for line in lines:
+                table.write(line)
+            table.flush()
+            os.fsync(table.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+# Бинарный формат записи пациента (little endian):
+#   H  длина остатка записи
+#   i  дата рождения, ordinal
+#   q  телефон
+#   B  код типа документа (порядок регистрации в document_types), тип
+#      хранится в нижнем регистре. Типы, добавленные во время работы,
+#      нужно регистрировать в том же порядке и при чтении файла
+#   16s  ключ записи (uuid), нули - записи без ключа
+#   B + utf-8  имя
+#   B + utf-8  фамилия
+#   B + utf-8  номер документа, строкой: у типов с шаблоном он не
+#      обязательно из цифр, у типов без длины важны ведущие нули
+RECORD_HEAD = struct.Struct("<HiqB16s")
+NO_KEY = bytes(16)
+
+
+# даты рождения повторяются, как и в homework.dates
+date_from_ordinal = lru_cache(maxsize=DATE_CACHE_SIZE)(datetime.fromordinal)
+
+
+def pack_record(first_name, last_name, birth_date, phone, document_type, document_id, key=None):
+    first, last = first_name.encode("utf-8"), last_name.encode("utf-8")
+    number = document_id.encode("utf-8")
+    if len(first) > 255 or len(last) > 255 or len(number) > 255:
+        raise ValueError("Field is too long for binary storage")
+    size = RECORD_HEAD.size - 2 + 3 + len(first) + len(last) + len(number)
+    return b"".join((RECORD_HEAD.pack(size, birth_date.toordinal(), int(phone),
+                                      document_types[document_type].code,
+                                      bytes.fromhex(key) if key else NO_KEY),
+                     bytes((len(first),)), first, bytes((len(last),)), last,
+                     bytes((len(number),)), number))
+
+
+def unpack_record(buffer, offset):
+    """Поля записи, начинающейся с offset, и смещение следующей записи"""
+    size, ordinal, phone, code, key = RECORD_HEAD.unpack_from(buffer, offset)
+    position = offset + RECORD_HEAD.size
+    first_size = buffer[position]
+    first_name = buffer[position + 1:position + 1 + first_size].decode("utf-8")
+    position += 1 + first_size
+    last_size = buffer[position]
+    last_name = buffer[position + 1:position + 1 + last_size].decode("utf-8")
+    position += 1 + last_size
+    number_size = buffer[position]
+    document_id = buffer[position + 1:position + 1 + number_size].decode("utf-8")
+    values = (first_name, last_name, date_from_ordinal(ordinal), str(phone),
+              document_types.by_code(code).name, document_id,
+              key.hex() if key != NO_KEY else None)
+    return values, offset + 2 + size
+
+
+def iter_records(path, offset=0):
+    """
+        Поля записей бинарного файла через mmap. Если файл вырос
+        во время чтения, он отображается заново, недописанная
+        последняя запись пропускается
+    """
+    with open(path, "rb") as table:
+        while True:
+            size = os.fstat(table.fileno()).st_size
+            if size - offset < RECORD_HEAD.size:
+                return
+            with mmap.mmap(table.fileno(), size, access=mmap.ACCESS_READ) as buffer:
+                while size - offset >= 2:
+                    record_size, = struct.unpack_from("<H", buffer, offset)
+                    if offset + 2 + record_size > size:
+                        break
+                    values, offset = unpack_record(buffer, offset)
+                    yield values
+            if os.fstat(table.fileno()).st_size == size:
+                return
+
+
+def csv_to_binary(source, destination):
+    """Перекладывает наш csv в бинарный формат, возвращает число записей"""
+    count = 0
+    with open(source, "r", encoding="utf-8") as table, open(destination, "wb") as binary:
+        for line in table:
+            if not line.endswith("\n"):
+                break
+            first_name, last_name, birth_date, phone, document_type, document_id, *key = line.rstrip("\n").split(",")
+            binary.write(pack_record(first_name, last_name, parse_date(birth_date),
+                                     phone, document_type, document_id, *key))
+            count += 1
+    return count
+
+
+def binary_to_csv(source, destination):
+    count = 0
+    with open(destination, "w", encoding="utf-8") as table:
+        for values in iter_records(source):
+            if values[-1] is None:
+                values = values[:-1]
+            table.write(u",".join(map(str, values)) + u"\n")
+            count += 1
+    return count
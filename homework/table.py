@@ -0,0 +1,112 @@
+import sys
+from array import array
+from datetime import datetime
+
+from homework.documents import document_types
+from homework.patient import Patient
+
+# номер документа лежит в document_texts
+TEXT_ID = -1
+
+
+class PatientTable:
+    """
+        Компактное хранение большого числа пациентов по столбцам.
+
+        Имена и фамилии интернируются, дата рождения хранится как
+        ordinal (время суток не сохраняется), телефон - как int64,
+        тип документа - кодом в списке встреченных типов. Номер
+        документа из цифр фиксированной длины типа хранится как
+        int64, прочие номера (типы с шаблоном или без длины) -
+        строкой в словаре document_texts.
+
+        Добавляемые значения проходят те же дескрипторы Patient,
+        что и при обычном создании. Строки таблицы отдаются как
+        Patient, поэтому имена по-прежнему нельзя изменить, а
+        изменения прочих полей через set проверяются дескрипторами
+    """
+
+    FIELDS = ("first_name", "last_name", "birth_date",
+              "phone", "document_type", "document_id")
+
+    def __init__(self, patients=()):
+        self.first_names = []
+        self.last_names = []
+        self.birth_dates = array("l")
+        self.phones = array("q")
+        self.document_types = array("B")
+        self.document_ids = array("q")
+        self.document_texts = {}
+        self.types = []
+        self.type_codes = {}
+        self.extend(patients)
+
+    @classmethod
+    def from_collection(cls, collection):
+        return cls(collection)
+
+    def __len__(self):
+        return len(self.phones)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError("Patient index out of range")
+        if i < 0:
+            i += len(self)
+        document_type = self.types[self.document_types[i]]
+        document_id = self.document_ids[i]
+        if document_id == TEXT_ID:
+            document_id = self.document_texts[i]
+        else:
+            document_id = str(document_id).zfill(document_types[document_type].size)
+        return Patient.restore(self.first_names[i], self.last_names[i],
+                               datetime.fromordinal(self.birth_dates[i]),
+                               str(self.phones[i]), document_type, document_id)
+
+    def append(self, patient):
+        if not isinstance(patient, Patient):
+            patient = Patient(*patient)
+        i = len(self)
+        self.first_names.append(sys.intern(patient.first_name))
+        self.last_names.append(sys.intern(patient.last_name))
+        self.birth_dates.append(patient.birth_date.toordinal())
+        self.phones.append(int(patient.phone))
+        self.document_types.append(self.type_code(patient.document_type))
+        self.document_ids.append(self.document_number(i, patient.document_type, patient.document_id))
+
+    def extend(self, patients):
+        for patient in patients:
+            self.append(patient)
+
+    def set(self, i, field, value):
+        patient = self[i]
+        if i < 0:
+            i += len(self)
+        setattr(patient, field, value)
+        if field == "birth_date":
+            self.birth_dates[i] = patient.birth_date.toordinal()
+        elif field == "phone":
+            self.phones[i] = int(patient.phone)
+        elif field in ("document_type", "document_id"):
+            self.document_types[i] = self.type_code(patient.document_type)
+            self.document_ids[i] = self.document_number(i, patient.document_type, patient.document_id)
+
+    def document_number(self, i, document_type, document_id):
+        size = document_types[document_type].size
+        if size is not None and len(document_id) == size and document_id.isdecimal():
+            self.document_texts.pop(i, None)
+            return int(document_id)
+        self.document_texts[i] = document_id
+        return TEXT_ID
+
+    def type_code(self, document_type):
+        code = self.type_codes.get(document_type)
+        if code is None:
+            code = len(self.types)
+            self.types.append(document_type)
+            self.type_codes[document_type] = code
+        return code
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+
+from homework.aio import AsyncPatientCollection, get_writer
+from homework.patient import Patient, PatientCollection, open_collection
+from tests.constants import GOOD_PARAMS, OTHER_GOOD_PARAMS, PATIENT_FIELDS
+
+
+@pytest.fixture()
+def table(tmp_path):
+    path = str(tmp_path / "table.csv")
+    PatientCollection(path).save_many([Patient(*GOOD_PARAMS), Patient(*OTHER_GOOD_PARAMS)] * 500)
+    return path
+
+
+def check_patient(patient, params):
+    true_patient = Patient(*params)
+    for field in PATIENT_FIELDS:
+        assert getattr(patient, field) == getattr(true_patient, field), f"Wrong attr {field}"
+
+
+def test_async_iteration(table):
+    async def main():
+        collection = AsyncPatientCollection(table, batch_size=64)
+        patients = [patient async for patient in collection]
+        first = await collection.limit(3)
+        return patients, first
+
+    patients, first = asyncio.run(main())
+    assert len(patients) == 1000, "Wrong number of patients in async iteration"
+    assert len(first) == 3, "Wrong limit length"
+    check_patient(patients[-1], OTHER_GOOD_PARAMS)
+    check_patient(first[0], GOOD_PARAMS)
+
+
+def test_concurrent_saves_are_coalesced(table, monkeypatch):
+    batches = []
+
+    async def main():
+        collection = AsyncPatientCollection(table)
+        writer = get_writer(table, "csv")
+        append = writer.append
+        monkeypatch.setattr(writer, "append", lambda lines: batches.append(len(lines)) or append(lines))
+        patient = Patient(*OTHER_GOOD_PARAMS)
+        await asyncio.gather(*(collection.save(patient) for _ in range(100)))
+
+    asyncio.run(main())
+    assert sum(batches) == 100, "Some saves were lost"
+    assert len(batches) < 100, "Concurrent saves were not batched"
+    assert len(PatientCollection(table)) == 1100, "Wrong number of rows after async saves"
+
+
+def test_event_loop_stays_responsive(table):
+    async def heartbeat(stop, gaps):
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    async def reader():
+        return [patient async for patient in AsyncPatientCollection(table, trusted=True, batch_size=100)]
+
+    async def main():
+        stop, gaps = asyncio.Event(), []
+        beat = asyncio.create_task(heartbeat(stop, gaps))
+        patient = Patient(*GOOD_PARAMS)
+        await asyncio.gather(*(reader() for _ in range(4)),
+                             *(AsyncPatientCollection(table).save(patient) for _ in range(200)))
+        stop.set()
+        await beat
+        return gaps
+
+    gaps = asyncio.run(main())
+    assert gaps and max(gaps) < 0.5, f"Event loop was blocked for {max(gaps):.3f}s"
+
+
+@pytest.mark.parametrize("backend", ["binary", "sqlite"])
+def test_save_async_uses_storage_backend(tmp_path, monkeypatch, backend):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("homework.patient.STORAGE_BACKEND", backend)
+
+    async def main():
+        await asyncio.gather(*(Patient(*params).save_async() for params in (GOOD_PARAMS, OTHER_GOOD_PARAMS)))
+
+    asyncio.run(main())
+    patients = list(open_collection())
+    assert len(patients) == 2 and not (tmp_path / "table.csv").exists()
+    check_patient(patients[0], GOOD_PARAMS)
+
+
+def test_failed_save_does_not_fail_the_batch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("homework.patient.STORAGE_BACKEND", "binary")
+    # имя длиннее 255 байт не помещается в бинарную запись
+    bad = Patient("Ада" * 100, *GOOD_PARAMS[1:])
+
+    async def main():
+        patients = [Patient(*GOOD_PARAMS)] * 3 + [bad] + [Patient(*OTHER_GOOD_PARAMS)] * 3
+        return await asyncio.gather(*(patient.save_async() for patient in patients), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert isinstance(results[3], ValueError), "Bad patient should get its own error"
+    assert results[:3] + results[4:] == [None] * 6, "Other saves in the batch should succeed"
+    assert len(list(open_collection())) == 6
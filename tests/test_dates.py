@@ -0,0 +1,40 @@
+import timeit
+from datetime import datetime
+
+import pytest
+from dateutil.parser import parse
+
+from homework.dates import parse_date, date_stats, clear_date_cache, _parse_date
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    clear_date_cache()
+    yield
+    clear_date_cache()
+
+
+@pytest.mark.parametrize("value", ["1978-01-31", "1978-01-31 00:00:00", "31.01.1978", "Jan 31 1978", "19780131"])
+def test_parse_date_matches_dateutil(value):
+    assert parse_date(value) == parse(value) == datetime(1978, 1, 31), f"Wrong date for {value}"
+
+
+@pytest.mark.parametrize("value", ["ABCDEF", "1978-13-45", ""])
+def test_parse_date_invalid(value):
+    with pytest.raises(ValueError):
+        parse_date(value)
+
+
+def test_date_cache_counters():
+    for _ in range(3):
+        parse_date("1978-01-31")
+    parse_date("31.01.1978")
+    stats = date_stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2, f"Wrong cache counters {stats}"
+    assert stats["fast"] == 1 and stats["fallback"] == 1, f"Wrong parse path counters {stats}"
+
+
+def test_fast_path_faster_than_dateutil():
+    fast = timeit.timeit(lambda: _parse_date("1978-01-31"), number=2000)
+    slow = timeit.timeit(lambda: parse("1978-01-31"), number=2000)
+    assert fast < slow, f"Fast path {fast:.4f}s is not faster than dateutil {slow:.4f}s"
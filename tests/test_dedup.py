@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from homework.config import PASSPORT_TYPE, CSV_PATH, INDEX_SUFFIX, FIELD_INDEX_SUFFIX, FIELD_INDEX_DELTA_SUFFIX
+from homework.dedup import duplicate_rows, similar_names
+from homework.patient import PatientCollection, Patient
+
+PARAMS = (
+    ("Кондрат", "Рюрик", "1971-01-11", "79160000000", PASSPORT_TYPE, "0228 000000"),
+    ("Евпатий", "Коловрат", "1972-01-11", "79160000001", PASSPORT_TYPE, "0228 000001"),
+    ("Кондратий", "Рюрик", "1971-01-11", "79160000002", PASSPORT_TYPE, "0228 000002"),
+    ("Ада", "Лавлейс", "1978-01-21", "+7 916 000 00 01", PASSPORT_TYPE, "0228 000003"),
+    ("Миртл", "Плакса", "1880-01-11", "79160000004", PASSPORT_TYPE, "0228 000004"),
+    ("Гарри", "Поттер", "2020-01-11", "79160000005", PASSPORT_TYPE, "0228-000004"),
+    ("Рон", "Уизли", "1900-04-20", "79160000006", PASSPORT_TYPE, "0228 000006"),
+    ("Рон", "Рюрик", "1971-01-11", "79160000007", PASSPORT_TYPE, "0228 000007"),
+)
+
+
+@pytest.fixture()
+def prepare():
+    with open(CSV_PATH, 'w', encoding='utf-8') as f:
+        f.write('')
+    PatientCollection(CSV_PATH).save_many(Patient(*params) for params in PARAMS)
+    yield
+    for suffix in ("", INDEX_SUFFIX, FIELD_INDEX_SUFFIX, FIELD_INDEX_SUFFIX + FIELD_INDEX_DELTA_SUFFIX):
+        if os.path.exists(CSV_PATH + suffix):
+            os.remove(CSV_PATH + suffix)
+
+
+@pytest.mark.parametrize("partitions", [1, 3, 64])
+def test_find_duplicates(prepare, partitions):
+    clusters = list(PatientCollection(CSV_PATH).find_duplicates(partitions))
+    names = [[patient.first_name for patient in cluster] for cluster in clusters]
+    assert names == [["Кондрат", "Кондратий"], ["Евпатий", "Ада"], ["Миртл", "Гарри"]]
+
+
+def test_find_duplicates_skips_old_versions(prepare):
+    collection = PatientCollection(CSV_PATH)
+    patient = collection[3]
+    patient.document_id = "0228 000033"
+    patient.save()
+    clusters = list(collection.find_duplicates())
+    names = [[patient.first_name for patient in cluster] for cluster in clusters]
+    assert names == [["Кондрат", "Кондратий"], ["Евпатий", "Ада"], ["Миртл", "Гарри"]]
+    assert clusters[1][1].document_id == "0228000033", "Cluster should hold the last version"
+    old = [[patient.first_name for patient in cluster] for cluster in collection.find_duplicates(live=False)]
+    assert ["Евпатий", "Ада", "Ада"] in old, "All versions should be compared with live=False"
+
+
+def test_duplicate_rows_chains():
+    lines = [
+        "Ада,Лавлейс,1978-01-21,79160000001,паспорт,0228000001",
+        "Ада,Лавлейс,1978-01-21,79160000002,паспорт,0228000002",
+        "Бэббидж,Чарльз,1791-12-26,79160000002,паспорт,0228000003",
+        "Бэббидж,Чарльз,1791-12-26,79160000004,загранпаспорт,0228000003",
+        "Алан,Тьюринг,1912-06-23,79160000005,паспорт,0228000005",
+    ]
+    assert list(duplicate_rows(lines, partitions=2)) == [[0, 1, 2, 3]]
+
+
+def test_duplicate_rows_compares_last_versions():
+    lines = [
+        "Ада,Лавлейс,1978-01-21,79160000001,паспорт,0228000001,a",
+        "Чарльз,Бэббидж,1791-12-26,79160000002,паспорт,0228000002,b",
+        "Ада,Лавлейс,1978-01-21,79160000003,паспорт,0228000002,a",
+        "Алан,Тьюринг,1912-06-23,79160000001,паспорт,0228000005,c",
+    ]
+    assert list(duplicate_rows(lines, partitions=2)) == [[1, 2]]
+    assert list(duplicate_rows(lines, partitions=2, live=False)) == [[0, 1, 2, 3]]
+
+
+def test_similar_names():
+    assert similar_names("кондрат", "кондратий")
+    assert not similar_names("рон", "кондрат")
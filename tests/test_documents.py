@@ -0,0 +1,91 @@
+import pytest
+
+from homework.config import PASSPORT_TYPE, INTERNATIONAL_PASSPORT_TYPE
+from homework.documents import DocumentTypeRegistry, document_types
+from homework.patient import Patient, BinaryPatientCollection
+from homework.table import PatientTable
+
+
+@pytest.fixture()
+def registry():
+    registry = DocumentTypeRegistry()
+    registry.register(PASSPORT_TYPE, 10)
+    registry.register("Пропуск", pattern=r"[0-9]{2}[a-z]{4}", normalizer=str.lower)
+    return registry
+
+
+def test_registry_lookup(registry):
+    assert "ПАСПОРТ" in registry and "пропуск" in registry
+    assert "полис" not in registry
+    assert registry["Пропуск"].code == 1
+    assert registry.by_code(0).name == PASSPORT_TYPE
+    assert list(registry) == [PASSPORT_TYPE, "пропуск"]
+    with pytest.raises(KeyError):
+        registry["полис"]
+    with pytest.raises(ValueError):
+        registry.register("ПРОПУСК")
+
+
+@pytest.mark.parametrize("document_type, number, result", [
+    (PASSPORT_TYPE, "0228 000000", "0228000000"),
+    ("Паспорт", "0228-000000", "0228000000"),
+    (PASSPORT_TYPE, "0228 00000", None),
+    ("пропуск", "12ABCD", "12abcd"),
+    ("пропуск", "12ABC", None),
+    ("полис", "0228000000", None),
+])
+def test_registry_normalize(registry, document_type, number, result):
+    assert registry.normalize(document_type, number) == result
+
+
+def test_default_types():
+    assert document_types[INTERNATIONAL_PASSPORT_TYPE].size == 9
+    assert [document.code for document in map(document_types.__getitem__, document_types)] == \
+        list(range(len(document_types)))
+
+
+@pytest.fixture()
+def quarantine_pass():
+    document = Patient.add_document_type("Карантинный пропуск", pattern=r"[0-9]{2}[a-z]{4}",
+                                         normalizer=str.lower)
+    yield document
+    document_types.unregister(document.name)
+
+
+@pytest.fixture()
+def sizeless_type():
+    document = Patient.add_document_type("полис")
+    yield document
+    document_types.unregister(document.name)
+
+
+def test_unregister(registry):
+    with pytest.raises(ValueError):
+        registry.unregister(PASSPORT_TYPE)
+    registry.unregister("ПРОПУСК")
+    assert "пропуск" not in registry and len(registry) == 1
+
+
+def test_patient_with_new_document_type(quarantine_pass):
+    patient = Patient("Ада", "Лавлейс", "1978-01-21", "89160000002", "КАРАНТИННЫЙ ПРОПУСК", "12ABCD")
+    assert patient.document_id == "12abcd"
+    with pytest.raises(ValueError):
+        Patient("Ада", "Лавлейс", "1978-01-21", "89160000002", "карантинный пропуск", "123456")
+
+
+@pytest.mark.parametrize("document_type, document_id", [
+    ("карантинный пропуск", "12abcd"),
+    ("полис", "0012"),
+    (PASSPORT_TYPE, "0228000002"),
+])
+def test_custom_types_in_column_stores(tmp_path, quarantine_pass, sizeless_type, document_type, document_id):
+    patient = Patient("Ада", "Лавлейс", "1978-01-21", "89160000002", document_type, document_id)
+    path = str(tmp_path / "table.bin")
+    collection = BinaryPatientCollection(path)
+    collection.append([patient])
+    stored, = collection
+    table = PatientTable([patient])
+    for restored in (stored, table[0], table[-1]):
+        assert restored.document_id == document_id and restored.document_type == patient.document_type
+    table.set(0, "document_id", "0228000002" if document_type == PASSPORT_TYPE else document_id)
+    assert table[0].document_id == patient.document_id
@@ -0,0 +1,26 @@
+import pytest
+
+from benchmarks.generator import PatientGenerator, write_csv
+from homework.patient import Patient, PatientCollection
+
+
+def test_generator_is_reproducible():
+    assert list(PatientGenerator(7, 0.5).rows(200)) == list(PatientGenerator(7, 0.5).rows(200))
+    assert list(PatientGenerator(7).rows(50)) != list(PatientGenerator(8).rows(50))
+
+
+def test_generated_rows_match_validation():
+    rows = list(PatientGenerator(3, invalid=0.5).rows(300))
+    assert 0 < sum(valid for _, valid in rows) < len(rows)
+    for params, valid in rows:
+        if valid:
+            Patient(*params)
+        else:
+            with pytest.raises((TypeError, ValueError)):
+                Patient(*params)
+
+
+def test_write_csv(tmp_path):
+    path = str(tmp_path / "table.csv")
+    write_csv(path, 100, seed=1)
+    assert len(list(PatientCollection(path))) == 100
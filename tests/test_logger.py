@@ -0,0 +1,82 @@
+import logging
+import os
+import queue
+import subprocess
+import sys
+
+import pytest
+
+from homework.config import GOOD_LOG_FILE, ERROR_LOG_FILE
+from homework.logger import enable_async_logging, shutdown_logging, BoundedQueueHandler, logger_info, handler
+from homework.patient import Patient
+from tests.constants import GOOD_PARAMS, WRONG_PARAMS
+
+
+def get_len(file):
+    if not os.path.exists(file):
+        return 0
+    with open(file, encoding='utf-8') as f:
+        return len(f.readlines())
+
+
+@pytest.fixture()
+def async_logging():
+    yield enable_async_logging(queue_size=1000, batch_size=16)
+    shutdown_logging()
+
+
+def test_async_logging_writes_all_records(async_logging):
+    info_len, error_len = get_len(GOOD_LOG_FILE), get_len(ERROR_LOG_FILE)
+    for _ in range(50):
+        Patient(*GOOD_PARAMS)
+    with pytest.raises(ValueError):
+        Patient(WRONG_PARAMS[0], *GOOD_PARAMS[1:])
+    shutdown_logging()
+    assert get_len(GOOD_LOG_FILE) == info_len + 50, "Info records were lost in async mode"
+    assert get_len(ERROR_LOG_FILE) == error_len + 1, "Error records were lost in async mode"
+    assert handler in logger_info.handlers, "Sync handler was not restored after shutdown"
+
+
+def test_async_logging_enable_twice(async_logging):
+    assert enable_async_logging() is async_logging, "Second enable should reuse the running pipeline"
+
+
+def test_drop_policy():
+    queue_handler = BoundedQueueHandler(queue.Queue(1), policy="drop")
+    for i in range(3):
+        queue_handler.handle(logging.makeLogRecord({"msg": f"record {i}"}))
+    assert queue_handler.dropped == 2, "Records over the queue size should be dropped"
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        BoundedQueueHandler(queue.Queue(1), policy="wait")
+
+
+def run_python(code, cwd):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    return subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env,
+                          capture_output=True, text=True, check=True).stdout
+
+
+def test_import_is_lazy(tmp_path):
+    out = run_python("import sys, homework.patient; "
+                     "print(sorted({'dateutil', 'numpy', 'concurrent', 'difflib'} & set(sys.modules)))",
+                     tmp_path)
+    assert out.strip() == "[]", "Heavy modules should be imported on first use"
+    assert os.listdir(tmp_path) == [], "Import should not create log files"
+
+
+def test_configure_logging(tmp_path):
+    run_python("from homework.logger import configure_logging\n"
+               "from homework.patient import Patient\n"
+               "configure_logging('good.log', 'bad.log')\n"
+               f"Patient(*{GOOD_PARAMS!r})\n"
+               "try:\n"
+               f"    Patient(*{WRONG_PARAMS!r})\n"
+               "except ValueError:\n"
+               "    pass\n", tmp_path)
+    assert sorted(os.listdir(tmp_path)) == ["bad.log", "good.log"]
+    assert get_len(str(tmp_path / "good.log")) == 1
+    assert get_len(str(tmp_path / "bad.log")) == 1
@@ -0,0 +1,71 @@
+import pytest
+
+from homework import metrics
+from homework.config import METRICS_SAMPLE_RATE
+from homework.logger import BatchFileHandler
+from homework.patient import Patient, PatientCollection, PhoneDescriptor, CollectionIterator
+from tests.constants import GOOD_PARAMS
+
+
+@pytest.fixture()
+def enabled():
+    metrics.reset()
+    metrics.enable(sample_rate=1)
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+def test_disable_restores_methods():
+    originals = (PhoneDescriptor.__set__, Patient.save, CollectionIterator.__next__)
+    metrics.enable()
+    metrics.enable()
+    assert metrics.enabled() and PhoneDescriptor.__set__ is not originals[0]
+    metrics.disable()
+    assert (PhoneDescriptor.__set__, Patient.save, CollectionIterator.__next__) == originals
+    assert "emit" not in BatchFileHandler.__dict__ and not metrics.enabled()
+
+
+def test_validation_and_rejections(enabled):
+    Patient(*GOOD_PARAMS)
+    with pytest.raises(ValueError):
+        Patient(GOOD_PARAMS[0], GOOD_PARAMS[1], GOOD_PARAMS[2], "не телефон", *GOOD_PARAMS[4:])
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["patient_rejections_total"] == {"phone": 1}
+    assert snapshot["histograms"]["patient_validation_seconds"]["phone"]["count"] == 2
+    assert snapshot["histograms"]["patient_validation_seconds"]["document_id"]["count"] == 1
+    assert snapshot["histograms"]["log_write_seconds"]["Error"]["count"] == 1
+
+
+def test_sampling_covers_every_field():
+    metrics.reset()
+    metrics.enable()
+    try:
+        for _ in range(2 * METRICS_SAMPLE_RATE):
+            Patient(*GOOD_PARAMS)
+        counts = {field: item["count"]
+                  for field, item in metrics.snapshot()["histograms"]["patient_validation_seconds"].items()}
+    finally:
+        metrics.disable()
+        metrics.reset()
+    assert counts == {field: 2 for field in Patient.FIELDS}
+
+
+def test_collection_rows_and_save(enabled, tmp_path):
+    path = str(tmp_path / "table.csv")
+    PatientCollection(path).save_many([Patient(*GOOD_PARAMS)] * 3)
+    assert len(list(PatientCollection(path))) == 3
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["collection_rows_read_total"] == {None: 3}
+    assert snapshot["histograms"]["patient_writer_flush_seconds"][None]["count"] == 1
+    assert snapshot["collection_rows_per_second"] > 0
+
+
+def test_prometheus_text(enabled):
+    with pytest.raises(ValueError):
+        Patient(GOOD_PARAMS[0], GOOD_PARAMS[1], "не дата", *GOOD_PARAMS[3:])
+    text = metrics.prometheus_text()
+    assert "# TYPE patient_rejections_total counter" in text
+    assert 'patient_rejections_total{field="birth_date"} 1' in text
+    assert 'patient_validation_seconds_bucket{field="birth_date",le="+Inf"} 1' in text
+    assert 'patient_validation_seconds_count{field="first_name"} 1' in text
@@ -0,0 +1,34 @@
+import pytest
+
+from homework.normalizer import normalize_phone, normalize_phones, normalize_document_id, extract_digits
+
+
+@pytest.mark.parametrize("number", ["89160000000", "+7-916-000-00-00", "+7(916)000-00-00", "8 916 000 00 00",
+                                    "7 916 000 00 00", "8/916/000/00/00"])
+def test_normalize_phone(number):
+    assert normalize_phone(number) == "89160000000", f"Wrong normalized phone for {number}"
+
+
+@pytest.mark.parametrize("number", ["sdfsdfsdf", "89160000000a", "8916000000", "891600000000", "88000000000",
+                                    "8.916.000.00.00", "", "+7_916_000_00_00"])
+def test_normalize_wrong_phone(number):
+    assert normalize_phone(number) is None, f"Phone {number} should be rejected"
+
+
+def test_normalize_phones_batch():
+    assert normalize_phones(["+7-916-000-00-00", "abc", "8 903 111 22 33"]) == \
+        ["89160000000", None, "89031112233"], "Wrong batch normalization"
+
+
+@pytest.mark.parametrize("number,size,result", [
+    ("0228 000000", 10, "0228000000"),
+    ("00/000-0000", 9, "000000000"),
+    ("0000 00000", 10, None),
+    ("0000 00000a", 9, None),
+])
+def test_normalize_document_id(number, size, result):
+    assert normalize_document_id(number, size) == result, f"Wrong document id for {number}"
+
+
+def test_extract_digits_unicode_digits():
+    assert extract_digits("٠١٢") == "٠١٢", "Unicode decimal digits should be kept as regex \\d does"
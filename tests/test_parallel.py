@@ -0,0 +1,144 @@
+import csv
+import os
+
+import pytest
+
+from homework.config import PASSPORT_TYPE
+from homework.logger import enable_async_logging, shutdown_logging
+from homework.parallel import byte_ranges
+from homework.patient import PatientCollection, Patient
+from tests.constants import GOOD_PARAMS, OTHER_GOOD_PARAMS, WRONG_PARAMS, PATIENT_FIELDS
+
+SOURCE_ROWS = [
+    ",".join(GOOD_PARAMS),
+    ",".join(WRONG_PARAMS),
+    ",".join(OTHER_GOOD_PARAMS),
+    "Ада,Лавлейс,1978-01-21",
+    "",
+    "Ада,Лавлейс,1978-01-21,+7 916 000 00 02," + PASSPORT_TYPE + ",0228 000002",
+]
+
+
+@pytest.fixture()
+def source(tmp_path):
+    path = tmp_path / "source.csv"
+    path.write_text("\n".join(SOURCE_ROWS * 20) + "\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("parts", [1, 2, 3, 7, 50, 1000])
+def test_byte_ranges(source, parts):
+    ranges = byte_ranges(source, parts)
+    assert ranges[0][0] == 0 and ranges[-1][1] == os.path.getsize(source), "Ranges should cover the whole file"
+    assert len(ranges) <= parts, "Too many ranges"
+    with open(source, "rb") as f:
+        data = f.read()
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and data[start - 1:start] == b"\n", "Range does not start at a line boundary"
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_import_csv(tmp_path, source, workers):
+    destination = str(tmp_path / "table.csv")
+    result = PatientCollection(destination).import_csv(source, workers=workers, chunk_size=512)
+    assert result.accepted == 60 and result.rejected == 40, f"Wrong import counters {result}"
+
+    expected = [params for params in (GOOD_PARAMS, OTHER_GOOD_PARAMS, SOURCE_ROWS[5].split(","))] * 20
+    patients = list(PatientCollection(destination))
+    assert len(patients) == len(expected), "Wrong number of imported rows"
+    for patient, params in zip(patients, expected):
+        true_patient = Patient(*params)
+        for field in PATIENT_FIELDS:
+            assert getattr(patient, field) == getattr(true_patient, field), "Imported rows are out of order"
+
+    with open(result.report, encoding="utf-8", newline="") as f:
+        report = list(csv.reader(f))
+    assert report[0] == ["line", "reason", "row"], "Wrong report header"
+    assert [row[0] for row in report[1:3]] == ["2", "4"], "Wrong rejected line numbers"
+    assert report[1][2] == SOURCE_ROWS[1], "Rejected row should be kept as is"
+
+
+def phone_of(patient):
+    return patient.phone
+
+
+def count_operator(counter, patient):
+    operator = patient.phone[1:4]
+    counter[operator] = counter.get(operator, 0) + 1
+    return counter
+
+
+def merge_counts(counter, part):
+    for operator, count in part.items():
+        counter[operator] = counter.get(operator, 0) + count
+    return counter
+
+
+@pytest.fixture()
+def table(tmp_path):
+    path = str(tmp_path / "table.csv")
+    patients = [Patient(GOOD_PARAMS[0], GOOD_PARAMS[1], GOOD_PARAMS[2], f"89{i % 3 + 16}{i:07}", *GOOD_PARAMS[4:])
+                for i in range(90)]
+    PatientCollection(path).save_many(patients)
+    return path
+
+
+@pytest.mark.parametrize("workers, ordered", [(1, True), (3, True), (3, False)])
+def test_parallel_map(table, workers, ordered):
+    collection = PatientCollection(table, trusted=True)
+    expected = [patient.phone for patient in collection]
+    result = list(collection.parallel_map(phone_of, workers, ordered, chunk_size=256))
+    assert (result if ordered else sorted(result)) == (expected if ordered else sorted(expected))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parallel_reduce(table, workers):
+    collection = PatientCollection(table, lazy=True)
+    counts = collection.parallel_reduce(count_operator, merge_counts, {}, workers, chunk_size=300)
+    assert counts == {"916": 30, "917": 30, "918": 30}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parallel_map_skips_partial_line(table, workers):
+    collection = PatientCollection(table, trusted=True)
+    expected = [patient.phone for patient in collection]
+    with open(table, "a", encoding="utf-8") as f:
+        f.write(Patient(*OTHER_GOOD_PARAMS).csv_line()[:30])
+    assert list(collection.parallel_map(phone_of, workers, chunk_size=256)) == expected
+
+
+def test_workers_with_async_logging(tmp_path, source, table):
+    # очередь меньше числа записей лога одного куска: без своих
+    # обработчиков в процессе-воркере запись в нее ждала бы вечно
+    enable_async_logging(queue_size=10)
+    try:
+        destination = str(tmp_path / "imported.csv")
+        result = PatientCollection(destination).import_csv(source, workers=2, chunk_size=1 << 16)
+        phones = list(PatientCollection(table).parallel_map(phone_of, 2, chunk_size=1 << 16))
+    finally:
+        shutdown_logging()
+    assert result.accepted == 60 and len(phones) == 90
+
+
+def test_import_ignores_foreign_keys(tmp_path):
+    source = tmp_path / "source.csv"
+    source.write_text(",".join(GOOD_PARAMS) + ",partnerid42\n" + ",".join(OTHER_GOOD_PARAMS) + "\n",
+                      encoding="utf-8")
+    destination = str(tmp_path / "table.csv")
+    result = PatientCollection(destination).import_csv(str(source), workers=1)
+    assert result.accepted == 1 and result.rejected == 1, "Rows with a 7th column should be rejected"
+    patient, = PatientCollection(destination)
+    assert patient.first_name == OTHER_GOOD_PARAMS[0] and len(patient.key) == 32
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_import_rejects_bad_encoding(tmp_path, workers):
+    source = tmp_path / "source.csv"
+    good = ",".join(GOOD_PARAMS).encode("utf-8") + b"\n"
+    source.write_bytes(good * 5 + b"\xff\xfe" + good + good * 5)
+    destination = str(tmp_path / "table.csv")
+    result = PatientCollection(destination).import_csv(str(source), workers=workers, chunk_size=64)
+    assert result.accepted == 10 and result.rejected == 1, f"Wrong import counters {result}"
+    with open(result.report, encoding="utf-8", newline="") as f:
+        report = list(csv.reader(f))
+    assert report[1][0] == "6" and "decode" in report[1][1], "Bad row should be reported"
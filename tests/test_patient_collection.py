@@ -1,9 +1,11 @@
 import os
+from datetime import datetime
 
 import pytest
 
-from homework.config import PASSPORT_TYPE, CSV_PATH
-from homework.patient import PatientCollection, Patient
+from homework.config import PASSPORT_TYPE, CSV_PATH, GOOD_LOG_FILE, INDEX_SUFFIX, \
+    FIELD_INDEX_SUFFIX, FIELD_INDEX_DELTA_SUFFIX
+from homework.patient import PatientCollection, Patient, CollectionIterator
 from tests.constants import PATIENT_FIELDS
 
 GOOD_PARAMS = (
@@ -31,6 +33,9 @@ def prepare():
         Patient(*params).save()
     yield
     os.remove(CSV_PATH)
+    for suffix in (INDEX_SUFFIX, FIELD_INDEX_SUFFIX, FIELD_INDEX_SUFFIX + FIELD_INDEX_DELTA_SUFFIX):
+        if os.path.exists(CSV_PATH + suffix):
+            os.remove(CSV_PATH + suffix)
 
 
 @pytest.mark.usefixtures('prepare')
@@ -76,3 +81,374 @@ def test_limit_remove_records():
     with open(CSV_PATH, 'w', encoding='utf-8') as f:
         f.write('')
     assert len([_ for _ in limit]) == 0, "Limit works wrong for empty file"
+
+
+def get_len(file):
+    with open(file, encoding='utf-8') as f:
+        return len(f.readlines())
+
+
+@pytest.mark.usefixtures('prepare')
+def test_save_many():
+    collection = PatientCollection(CSV_PATH)
+    log_len = get_len(GOOD_LOG_FILE)
+    saved = collection.save_many((Patient(*params) for params in GOOD_PARAMS), batch_size=5)
+    assert saved == len(GOOD_PARAMS), "Wrong number of saved patients"
+    assert get_len(CSV_PATH) == 2 * len(GOOD_PARAMS), "Wrong csv length after save_many"
+    # по записи на создание каждого пациента и одна на каждую пачку
+    assert get_len(GOOD_LOG_FILE) - log_len == len(GOOD_PARAMS) + 3, "Wrong info log length"
+    for i, patient in enumerate(collection):
+        true_patient = Patient(*GOOD_PARAMS[i % len(GOOD_PARAMS)])
+        for field in PATIENT_FIELDS:
+            assert getattr(patient, field) == getattr(true_patient, field), f"Wrong attr {field} after save_many"
+
+
+@pytest.mark.usefixtures('prepare')
+def test_writer_flushes_on_exit():
+    collection = PatientCollection(CSV_PATH)
+    with collection.writer(batch_size=100) as writer:
+        writer.write(Patient(*GOOD_PARAMS[0]))
+        assert get_len(CSV_PATH) == len(GOOD_PARAMS), "Row should stay buffered until flush"
+    assert get_len(CSV_PATH) == len(GOOD_PARAMS) + 1, "Buffered row was not flushed on exit"
+
+
+def check_patient(patient, params):
+    true_patient = Patient(*params)
+    for field in PATIENT_FIELDS:
+        assert getattr(patient, field) == getattr(true_patient, field), f"Wrong attr {field} for {params}"
+
+
+@pytest.mark.usefixtures('prepare')
+def test_random_access():
+    collection = PatientCollection(CSV_PATH)
+    assert len(collection) == len(GOOD_PARAMS), "Wrong collection length"
+    check_patient(collection[0], GOOD_PARAMS[0])
+    check_patient(collection[7], GOOD_PARAMS[7])
+    check_patient(collection[-1], GOOD_PARAMS[-1])
+    with pytest.raises(IndexError):
+        collection[len(GOOD_PARAMS)]
+    assert os.path.exists(CSV_PATH + INDEX_SUFFIX), "Index file was not created"
+
+
+@pytest.mark.usefixtures('prepare')
+@pytest.mark.parametrize("item", [slice(2, 5), slice(None, 3), slice(10, None), slice(1, 12, 3),
+                                  slice(None, None, -1), slice(10, 2, -3), slice(5, 2)])
+def test_slicing(item):
+    patients = PatientCollection(CSV_PATH)[item]
+    expected = GOOD_PARAMS[item]
+    assert len(patients) == len(expected), f"Wrong slice length for {item}"
+    for patient, params in zip(patients, expected):
+        check_patient(patient, params)
+
+
+@pytest.mark.usefixtures('prepare')
+def test_skip():
+    collection = PatientCollection(CSV_PATH)
+    for patient, params in zip(collection.skip(5), GOOD_PARAMS[5:]):
+        check_patient(patient, params)
+    assert len(list(collection.skip(5))) == len(GOOD_PARAMS) - 5, "Wrong skip length"
+    assert len(list(collection.skip(5, 3))) == 3, "Wrong skip with limit length"
+    assert len(list(collection.skip(100))) == 0, "Skip out of range should be empty"
+
+
+@pytest.mark.parametrize("same_collection", [True, False])
+def test_index_detects_rewrite_in_place(tmp_path, same_collection):
+    path = str(tmp_path / "table.csv")
+    first, second = Patient(*GOOD_PARAMS[0]), Patient(*GOOD_PARAMS[10])
+    PatientCollection(path).save_many([first, second])
+    collection = PatientCollection(path)
+    assert len(collection) == 2 and collection.find_by_phone(first.phone)
+    # тот же inode, файл длиннее, на старой границе - конец строки
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(second.csv_line() + first.csv_line() + first.csv_line())
+    if not same_collection:
+        collection = PatientCollection(path)
+    assert [patient.first_name for patient in collection[0:3]] == [second.first_name] + [first.first_name] * 2
+    assert {patient.key for patient in collection.find_by_phone(first.phone)} == {first.key}
+    assert collection.find_by_phone(second.phone)[0].key == second.key
+
+
+@pytest.mark.usefixtures('prepare')
+def test_index_follows_file_changes():
+    collection = PatientCollection(CSV_PATH)
+    assert len(collection) == len(GOOD_PARAMS)
+    new_params = ("Митрофан", "Космодемьянский", "1999-10-15", "79030000000", PASSPORT_TYPE, "4510 000444")
+    Patient(*new_params).save()
+    assert len(collection) == len(GOOD_PARAMS) + 1, "Index was not extended after save"
+    check_patient(collection[-1], new_params)
+    # новый объект коллекции читает индекс с диска
+    assert len(PatientCollection(CSV_PATH)) == len(GOOD_PARAMS) + 1, "Index was not persisted"
+
+    with open(CSV_PATH, 'w', encoding='utf-8') as f:
+        f.write(Patient(*new_params).csv_line())
+    assert len(collection) == 1, "Index was not rebuilt after rewrite"
+    check_patient(collection[0], new_params)
+
+
+@pytest.mark.usefixtures('prepare')
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+def test_iteration_chunk_sizes(chunk_size):
+    patients = list(CollectionIterator(CSV_PATH, chunk_size=chunk_size))
+    assert len(patients) == len(GOOD_PARAMS), f"Wrong number of rows for chunk size {chunk_size}"
+    for patient, params in zip(patients, GOOD_PARAMS):
+        check_patient(patient, params)
+
+
+@pytest.mark.usefixtures('prepare')
+def test_iterator_offset():
+    iterator = CollectionIterator(CSV_PATH)
+    for _ in iterator:
+        pass
+    assert iterator.offset == os.path.getsize(CSV_PATH), "Offset should point to the end of file"
+
+
+@pytest.mark.usefixtures('prepare')
+def test_iterator_stops_after_truncation():
+    line = Patient(*GOOD_PARAMS[0]).csv_line().encode("utf-8")
+    iterator = CollectionIterator(CSV_PATH, chunk_size=len(line) + 40)
+    check_patient(next(iterator), GOOD_PARAMS[0])
+    with open(CSV_PATH, 'w', encoding='utf-8') as f:
+        f.write(Patient(*GOOD_PARAMS[1]).csv_line())
+    assert list(iterator) == [] and iterator.truncated, "Iterator should stop on a truncated file"
+    PatientCollection(CSV_PATH).save_many([Patient(*GOOD_PARAMS[2])])
+    assert list(iterator) == [], "Stale buffer was glued to the new rows"
+
+
+@pytest.mark.usefixtures('prepare')
+def test_trusted_iteration():
+    log_len = get_len(GOOD_LOG_FILE)
+    collection = PatientCollection(CSV_PATH, trusted=True)
+    patients = list(collection)
+    assert get_len(GOOD_LOG_FILE) == log_len, "Trusted loading should not validate and log patients"
+    assert len(patients) == len(GOOD_PARAMS), "Wrong number of trusted rows"
+    for patient, params in zip(patients, GOOD_PARAMS):
+        check_patient(patient, params)
+    check_patient(collection[3], GOOD_PARAMS[3])
+    check_patient(collection.limit(2).__next__(), GOOD_PARAMS[0])
+
+
+@pytest.mark.usefixtures('prepare')
+def test_trusted_patient_keeps_descriptors():
+    patient = next(iter(PatientCollection(CSV_PATH, trusted=True)))
+    with pytest.raises(AttributeError):
+        patient.first_name = "Другой"
+    with pytest.raises(ValueError):
+        patient.phone = "sdfsdfsdf"
+    patient.phone = "+7-916-111-11-11"
+    assert patient.phone == "89161111111", "Trusted patient phone was not validated on change"
+
+
+@pytest.mark.usefixtures('prepare')
+def test_to_arrays():
+    np = pytest.importorskip("numpy")
+    arrays = PatientCollection(CSV_PATH).to_arrays()
+    assert len(arrays) == len(GOOD_PARAMS), "Wrong number of rows in arrays"
+    assert arrays.birth_date.dtype == np.dtype("datetime64[D]"), "Wrong birth_date dtype"
+    assert arrays.operator.dtype == np.int16, "Wrong operator dtype"
+    assert arrays.birth_date[0] == np.datetime64("1971-01-11"), "Wrong birth date"
+    assert arrays.phone[3] == 89160000003, "Wrong phone"
+    assert arrays.document_id[0] == "0228000000", "Wrong document id"
+    assert arrays.counts_by_operator() == {916: len(GOOD_PARAMS)}, "Wrong operator counts"
+    assert arrays.counts_by_document_type() == {PASSPORT_TYPE: len(GOOD_PARAMS)}, "Wrong document type counts"
+    ages = arrays.ages(today="2020-01-11")
+    assert ages[0] == 49 and ages[6] == 0 and ages[8] == 41, "Wrong ages"
+    buckets = arrays.age_buckets(width=50, today="2020-01-11")
+    assert buckets == {0: 10, 100: 3}, f"Wrong age buckets {buckets}"
+
+
+def test_to_arrays_mixed_widths(tmp_path):
+    pytest.importorskip("numpy")
+    path = tmp_path / "table.csv"
+    # 6 + 6 * 7 полей делится на ширину первой строки
+    lines = [Patient(*GOOD_PARAMS[0]).csv_line().rsplit(",", 1)[0] + "\n"]
+    lines += [Patient(*params).csv_line() for params in GOOD_PARAMS[1:7]]
+    path.write_text("".join(lines), encoding="utf-8")
+    arrays = PatientCollection(str(path)).to_arrays()
+    assert len(arrays) == 7, "Wrong number of rows in arrays"
+    assert arrays.phone.tolist() == [89160000000 + i for i in range(7)], "Columns were shifted"
+
+
+@pytest.mark.usefixtures('prepare')
+def test_find_by_phone():
+    collection = PatientCollection(CSV_PATH)
+    found = collection.find_by_phone("+7 (916) 000-00-05")
+    assert len(found) == 1, "Patient was not found by phone"
+    check_patient(found[0], GOOD_PARAMS[5])
+    assert collection.find_by_phone("+7 (916) 999-99-99") == [], "Unknown phone should not be found"
+    assert collection.find_by_phone("abc") == [], "Invalid phone should not be found"
+
+
+@pytest.mark.usefixtures('prepare')
+def test_find_by_document():
+    collection = PatientCollection(CSV_PATH)
+    found = collection.find_by_document(PASSPORT_TYPE.upper(), "0228-000007")
+    assert len(found) == 1, "Patient was not found by document"
+    check_patient(found[0], GOOD_PARAMS[7])
+    assert collection.find_by_document("справка", "0228-000007") == [], "Unknown document type"
+
+
+@pytest.mark.usefixtures('prepare')
+def test_find_by_last_name():
+    collection = PatientCollection(CSV_PATH)
+    found = collection.find_by_last_name("ко")
+    assert [patient.last_name for patient in found] == ["Коловрат"], "Wrong last name prefix search"
+    assert len(collection.find_by_last_name("")) == len(GOOD_PARAMS), "Empty prefix should match everyone"
+
+
+@pytest.mark.usefixtures('prepare')
+def test_field_index_follows_file_changes():
+    collection = PatientCollection(CSV_PATH)
+    assert collection.find_by_phone("79030000000") == []
+    new_params = ("Митрофан", "Космодемьянский", "1999-10-15", "79030000000", PASSPORT_TYPE, "4510 000444")
+    Patient(*new_params).save()
+    found = collection.find_by_phone("79030000000")
+    assert len(found) == 1, "Field index was not extended after save"
+    check_patient(found[0], new_params)
+    assert [p.last_name for p in PatientCollection(CSV_PATH).find_by_last_name("Кос")] == ["Космодемьянский"], \
+        "Field index was not persisted"
+
+    with open(CSV_PATH, 'w', encoding='utf-8') as f:
+        f.write(Patient(*GOOD_PARAMS[0]).csv_line())
+    assert collection.find_by_phone("79030000000") == [], "Field index was not rebuilt after rewrite"
+    check_patient(collection.find_by_phone("79160000000")[0], GOOD_PARAMS[0])
+
+
+@pytest.mark.usefixtures('prepare')
+def test_field_index_appends_delta():
+    collection = PatientCollection(CSV_PATH)
+    collection.find_by_phone("79160000000")
+    with open(CSV_PATH + FIELD_INDEX_SUFFIX, encoding="utf-8") as f:
+        base = f.read()
+    new_params = ("Митрофан", "Космодемьянский", "1999-10-15", "79030000000", PASSPORT_TYPE, "4510 000444")
+    for _ in range(3):
+        Patient(*new_params).save()
+        collection.find_by_phone("79030000000")
+    with open(CSV_PATH + FIELD_INDEX_SUFFIX, encoding="utf-8") as f:
+        assert f.read() == base, "Field index json was rewritten on append"
+    delta = CSV_PATH + FIELD_INDEX_SUFFIX + FIELD_INDEX_DELTA_SUFFIX
+    with open(delta, encoding="utf-8") as f:
+        assert len(f.readlines()) == 3, "Appended rows should go to the delta file"
+    assert len(PatientCollection(CSV_PATH).find_by_phone("79030000000")) == 3, "Delta was not loaded"
+
+    with open(delta, "a", encoding="utf-8") as f:
+        f.write('[1, 2, ')
+    assert len(PatientCollection(CSV_PATH).find_by_phone("79030000000")) == 3, "Broken delta was not skipped"
+    assert not os.path.exists(delta), "Broken delta should be folded into the json"
+
+
+@pytest.mark.usefixtures('prepare')
+def test_lookups_return_last_versions():
+    collection = PatientCollection(CSV_PATH)
+    assert len(collection.find_by_phone("79160000002")) == 1
+    patient = collection[2]
+    patient.phone = "+7-916-222-22-22"
+    patient.save()
+    assert collection.find_by_phone("79160000002") == [], "Superseded version was found by the old phone"
+    found, = collection.find_by_phone("79162222222")
+    assert found.key == patient.key
+    found, = collection.find_by_document(PASSPORT_TYPE, "0228 000002")
+    assert found.phone == "89162222222", "Lookup by document should return the last version"
+    assert [p.phone for p in PatientCollection(CSV_PATH).find_by_last_name(patient.last_name)] == ["89162222222"]
+
+
+@pytest.mark.usefixtures('prepare')
+def test_updates_and_compaction():
+    collection = PatientCollection(CSV_PATH)
+    patient = collection[2]
+    key = patient.key
+    patient.phone = "+7-916-222-22-22"
+    patient.save()
+    patient.birth_date = "1990-05-05"
+    patient.save()
+    assert len(collection) == len(GOOD_PARAMS) + 2, "Updates should be appended"
+
+    live = list(collection.live())
+    assert len(live) == len(GOOD_PARAMS), "Superseded versions should be hidden"
+    updated = [p for p in live if p.key == key]
+    assert len(updated) == 1 and updated[0].phone == "89162222222", "Last version should win"
+    assert updated[0].birth_date == datetime(1990, 5, 5), "Last version should win"
+
+    assert collection.compact() == 2, "Wrong number of removed rows"
+    assert len(collection) == len(GOOD_PARAMS), "Index was not rebuilt after compaction"
+    assert [p.phone for p in collection] == [p.phone for p in live], "Compaction changed live rows"
+    assert collection.find_by_phone("79160000002") == [], "Field index still has the old version"
+    Patient(*GOOD_PARAMS[0]).save()
+    assert len(collection) == len(GOOD_PARAMS) + 1, "Saves after compaction should go to the new file"
+
+
+@pytest.mark.usefixtures('prepare')
+def test_rows_without_key():
+    with open(CSV_PATH, 'a', encoding='utf-8') as f:
+        f.write("Ада,Лавлейс,1978-01-21 00:00:00,89160000002,паспорт,0228000002\n")
+    collection = PatientCollection(CSV_PATH)
+    assert len(list(collection.live())) == len(GOOD_PARAMS) + 1, "Rows without key are always live"
+    check_patient(list(PatientCollection(CSV_PATH, trusted=True))[-1], GOOD_PARAMS[2])
+    assert collection.compact() == 0, "Rows without key should not be removed"
+
+
+@pytest.mark.usefixtures('prepare')
+@pytest.mark.parametrize("trusted", [False, True])
+def test_lazy_iteration(trusted):
+    patients = list(PatientCollection(CSV_PATH, trusted=trusted, lazy=True))
+    assert len(patients) == len(GOOD_PARAMS)
+    for patient, params in zip(patients, GOOD_PARAMS):
+        assert "birth_date" not in patient.__dict__, "Fields should be parsed on access"
+        check_patient(patient, params)
+    assert isinstance(patients[0].birth_date, datetime)
+    with pytest.raises(AttributeError):
+        patients[0].first_name = "Другое"
+
+
+def test_lazy_patient_errors_on_access():
+    with open(CSV_PATH, 'w', encoding='utf-8') as f:
+        f.write("Ада,Лавлейс,1978-01-21,не телефон,паспорт,0228000002\n")
+    try:
+        patient, = PatientCollection(CSV_PATH, lazy=True)
+        assert patient.last_name == "Лавлейс"
+        with pytest.raises(ValueError):
+            patient.phone
+    finally:
+        os.remove(CSV_PATH)
+
+
+@pytest.mark.usefixtures('prepare')
+@pytest.mark.parametrize("lazy", [False, True])
+def test_filter(lazy):
+    collection = PatientCollection(CSV_PATH, lazy=lazy)
+    assert len(list(collection.filter(document_type=PASSPORT_TYPE.upper()))) == len(GOOD_PARAMS)
+    found, = collection.filter(phone="+7 (916) 000-00-02")
+    check_patient(found, GOOD_PARAMS[2])
+    found, = collection.filter(birth_date="21.01.1978", last_name="Лавлейс")
+    check_patient(found, GOOD_PARAMS[2])
+    found, = collection.filter(document_id="0228-000012")
+    check_patient(found, GOOD_PARAMS[12])
+    assert list(collection.filter(phone="79160000002", first_name="Рон")) == []
+    with pytest.raises(TypeError):
+        list(collection.filter(age=42))
+
+
+def test_filter_by_invalid_value(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text("Ада,Лавлейс,1978-01-21,не телефон,паспорт,номер\n", encoding="utf-8")
+    collection = PatientCollection(str(path), lazy=True)
+    assert list(collection.filter(phone="123")) == []
+    assert list(collection.filter(document_id="abc")) == []
+
+
+@pytest.mark.usefixtures('prepare')
+@pytest.mark.parametrize("same_collection", [True, False])
+def test_compact_then_append(same_collection):
+    collection = PatientCollection(CSV_PATH)
+    reader = collection if same_collection else PatientCollection(CSV_PATH)
+    assert len(reader) == len(GOOD_PARAMS) and reader.find_by_phone(GOOD_PARAMS[0][3])
+    patient = collection[0]
+    patient.phone = "+7-916-222-22-22"
+    patient.save()
+    assert len(reader) == len(GOOD_PARAMS) + 1
+    collection.compact()
+    collection.save_many([Patient(*GOOD_PARAMS[1]), Patient(*GOOD_PARAMS[2])])
+    assert len(reader) == len(GOOD_PARAMS) + 2, "Index kept offsets of the replaced file"
+    for i, params in enumerate(GOOD_PARAMS[1:] + (GOOD_PARAMS[0],) + GOOD_PARAMS[1:3]):
+        assert reader[i].first_name == params[0], "Index kept offsets of the replaced file"
+    assert reader.field_index().by_phone("89162222222") == [len(GOOD_PARAMS) - 1]
+    assert [p.first_name for p in reader.find_by_phone(GOOD_PARAMS[1][3])] == [GOOD_PARAMS[1][0]] * 2
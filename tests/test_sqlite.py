@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+from homework.config import PASSPORT_TYPE
+from homework.patient import Patient, open_collection
+from homework.sqlite import SqlitePatientCollection, SELECT_ALL
+from tests.constants import GOOD_PARAMS, OTHER_GOOD_PARAMS, PATIENT_FIELDS
+
+PARAMS = [GOOD_PARAMS, OTHER_GOOD_PARAMS,
+          ("Ада", "Лавлейс", "1978-01-21", "79160000002", PASSPORT_TYPE, "0228 000002")]
+
+
+def check_patient(patient, params):
+    true_patient = Patient(*params)
+    for field in PATIENT_FIELDS:
+        assert getattr(patient, field) == getattr(true_patient, field), f"Wrong attr {field}"
+
+
+@pytest.fixture()
+def collection(tmp_path):
+    collection = SqlitePatientCollection(str(tmp_path / "patients.db"), pool_size=2)
+    collection.save_many([Patient(*params) for params in PARAMS], batch_size=2)
+    yield collection
+    collection.close()
+
+
+def test_sqlite_iteration(collection):
+    patients = list(collection)
+    assert len(patients) == len(collection) == len(PARAMS), "Wrong number of patients"
+    for patient, params in zip(patients, PARAMS):
+        check_patient(patient, params)
+    limit = collection.limit(2)
+    with pytest.raises(TypeError):
+        len(limit)
+    assert len(list(limit)) == 2, "Wrong limit length"
+
+
+def test_sqlite_unfinished_iterators_release_connections(collection):
+    iterators = [iter(collection) for _ in range(3)]
+    for iterator in iterators:
+        next(iterator)
+    collection.append([Patient(*GOOD_PARAMS)])
+    assert len(collection) == len(PARAMS) + 1, "Pool was drained by unfinished iterators"
+    pages = collection.query(SELECT_ALL, page_size=1)
+    assert len(list(pages)) == len(list(collection.limit(10))) == len(PARAMS) + 1
+
+
+def test_sqlite_save_many_from_generator(collection):
+    saved = collection.save_many((Patient(*params) for params in PARAMS), batch_size=2)
+    assert saved == len(PARAMS) and len(collection) == 2 * len(PARAMS)
+
+
+def test_sqlite_lookups(collection):
+    check_patient(collection.find_by_phone("+7 (916) 000-00-02")[0], PARAMS[2])
+    check_patient(collection.find_by_document(PASSPORT_TYPE.upper(), "1111-111111")[0], OTHER_GOOD_PARAMS)
+    assert [p.last_name for p in collection.find_by_last_name("ла")] == ["Лавлейс"], "Wrong prefix search"
+    assert collection.find_by_phone("abc") == [], "Invalid phone should not be found"
+
+
+def test_sqlite_failed_batch_is_rolled_back(collection):
+    class Broken:
+        pass
+
+    with pytest.raises(AttributeError):
+        collection.append([Patient(*GOOD_PARAMS), Broken()])
+    assert len(collection) == len(PARAMS), "Failed batch should not be committed"
+
+
+def test_sqlite_concurrent_readers_and_writer(collection):
+    errors = []
+
+    def read():
+        try:
+            for _ in range(20):
+                assert len(list(collection)) >= len(PARAMS)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    collection.save_many([Patient(*GOOD_PARAMS) for _ in range(50)], batch_size=10)
+    for thread in threads:
+        thread.join()
+    assert not errors, f"Readers failed: {errors}"
+    assert len(collection) == len(PARAMS) + 50, "Wrong number of rows after concurrent writes"
+
+
+def test_save_with_sqlite_backend(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("homework.patient.STORAGE_BACKEND", "sqlite")
+    Patient(*GOOD_PARAMS).save()
+    Patient(*OTHER_GOOD_PARAMS).save()
+    collection = open_collection()
+    assert isinstance(collection, SqlitePatientCollection), "Wrong backend from config"
+    assert [p.first_name for p in collection] == [GOOD_PARAMS[0], OTHER_GOOD_PARAMS[0]], "Saves were not routed"
+    collection.close()
+
+
+def test_sqlite_update_in_place(collection):
+    patient = collection.find_by_phone(OTHER_GOOD_PARAMS[3])[0]
+    patient.phone = "+7-916-222-22-22"
+    collection.append([patient])
+    assert len(collection) == len(PARAMS), "Update should not add a row"
+    assert collection.find_by_phone(OTHER_GOOD_PARAMS[3]) == [], "Old phone is still indexed"
+    assert collection.find_by_phone("89162222222")[0].key == patient.key, "Updated row lost its key"
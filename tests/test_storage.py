@@ -0,0 +1,89 @@
+import multiprocessing
+
+import pytest
+
+from homework.config import CSV_PATH
+from homework.patient import Patient, PatientCollection, CollectionIterator, BinaryPatientCollection, open_collection
+from homework.storage import append_rows, pack_record, csv_to_binary, binary_to_csv
+from tests.constants import GOOD_PARAMS, OTHER_GOOD_PARAMS, PATIENT_FIELDS
+
+WRITERS = 4
+ROWS = 200
+
+
+def save_rows(path, params, batch_size):
+    patient = Patient(*params)
+    if batch_size == 1:
+        for _ in range(ROWS):
+            append_rows(path, patient.csv_line())
+    else:
+        PatientCollection(path).save_many([patient] * ROWS, batch_size)
+    return patient.csv_line()
+
+
+@pytest.mark.parametrize("batch_size", [1, 7])
+def test_concurrent_appends_keep_rows_whole(tmp_path, batch_size):
+    path = str(tmp_path / "table.csv")
+    params = [GOOD_PARAMS, OTHER_GOOD_PARAMS] * (WRITERS // 2)
+    with multiprocessing.Pool(WRITERS) as pool:
+        lines = pool.starmap(save_rows, [(path, p, batch_size) for p in params])
+    with open(path, encoding="utf-8") as f:
+        rows = f.readlines()
+    assert len(rows) == WRITERS * ROWS, "Some rows were lost"
+    assert set(rows) == set(lines), "Rows from different writers were interleaved"
+
+
+def test_partial_trailing_line_is_not_read(tmp_path):
+    path = str(tmp_path / "table.csv")
+    line = Patient(*GOOD_PARAMS).csv_line()
+    append_rows(path, line + line[:10])
+    iterator = CollectionIterator(path)
+    assert len(list(iterator)) == 1, "Partial last line should not be read"
+    append_rows(path, line[10:])
+    patient = next(iterator)
+    true_patient = Patient(*GOOD_PARAMS)
+    for field in PATIENT_FIELDS:
+        assert getattr(patient, field) == getattr(true_patient, field), "Completed line was read wrong"
+
+
+def check_patient(patient, params):
+    true_patient = Patient(*params)
+    for field in PATIENT_FIELDS:
+        assert getattr(patient, field) == getattr(true_patient, field), f"Wrong attr {field}"
+
+
+def test_binary_collection(tmp_path):
+    collection = BinaryPatientCollection(str(tmp_path / "table.bin"))
+    assert list(collection) == [], "Missing binary file should be empty"
+    collection.save_many([Patient(*GOOD_PARAMS), Patient(*OTHER_GOOD_PARAMS)] * 3, batch_size=4)
+    patients = list(collection)
+    assert len(patients) == 6, "Wrong number of binary records"
+    for patient, params in zip(patients, [GOOD_PARAMS, OTHER_GOOD_PARAMS] * 3):
+        check_patient(patient, params)
+    assert len(list(collection.limit(4))) == 4, "Wrong binary limit"
+
+
+def test_binary_partial_record_is_skipped(tmp_path):
+    path = str(tmp_path / "table.bin")
+    record = pack_record(*Patient(*GOOD_PARAMS).values(), None)
+    append_rows(path, record + record[:5])
+    assert len(list(BinaryPatientCollection(path))) == 1, "Partial binary record should be skipped"
+
+
+def test_binary_csv_conversion(tmp_path):
+    csv_path, binary_path, back_path = (str(tmp_path / name) for name in ("a.csv", "a.bin", "b.csv"))
+    PatientCollection(csv_path).save_many([Patient(*GOOD_PARAMS), Patient(*OTHER_GOOD_PARAMS)])
+    assert csv_to_binary(csv_path, binary_path) == 2, "Wrong number of converted rows"
+    assert binary_to_csv(binary_path, back_path) == 2, "Wrong number of converted records"
+    with open(csv_path, encoding="utf-8") as a, open(back_path, encoding="utf-8") as b:
+        assert a.read() == b.read(), "Round trip through binary changed the data"
+
+
+def test_save_with_binary_backend(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("homework.patient.STORAGE_BACKEND", "binary")
+    Patient(*GOOD_PARAMS).save()
+    collection = open_collection()
+    assert isinstance(collection, BinaryPatientCollection), "Wrong backend from config"
+    check_patient(next(iter(collection)), GOOD_PARAMS)
+    assert not (tmp_path / CSV_PATH).exists(), "Csv should not be written with binary backend"
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pytest
+
+from homework.config import PASSPORT_TYPE, INTERNATIONAL_PASSPORT_TYPE
+from homework.patient import Patient
+from homework.table import PatientTable
+from tests.constants import GOOD_PARAMS, OTHER_GOOD_PARAMS, WRONG_PARAMS, PATIENT_FIELDS
+
+
+def test_table_roundtrip():
+    params = [GOOD_PARAMS, OTHER_GOOD_PARAMS,
+              ("Ада", "Лавлейс", "1978-01-21", "79160000002", INTERNATIONAL_PASSPORT_TYPE, "00 0000001")]
+    table = PatientTable(params)
+    assert len(table) == len(params), "Wrong table length"
+    for patient, row in zip(table, params):
+        true_patient = Patient(*row)
+        for field in PATIENT_FIELDS:
+            assert getattr(patient, field) == getattr(true_patient, field), f"Wrong attr {field} for {row}"
+    assert table[-1].document_id == "000000001", "Leading zeros of document id were lost"
+    assert table.first_names[0] is PatientTable([GOOD_PARAMS]).first_names[0], "Names should be interned"
+
+
+@pytest.mark.parametrize("i", list(range(len(GOOD_PARAMS))))
+def test_table_validates_rows(i):
+    table = PatientTable()
+    with pytest.raises(ValueError):
+        table.append((*GOOD_PARAMS[:i], WRONG_PARAMS[i], *GOOD_PARAMS[i + 1:]))
+    assert len(table) == 0, "Invalid row should not be stored"
+
+
+def test_table_set():
+    table = PatientTable([GOOD_PARAMS])
+    with pytest.raises(AttributeError):
+        table.set(0, "first_name", "Другой")
+    with pytest.raises(ValueError):
+        table.set(0, "phone", "sdfsdfsdf")
+    table.set(0, "phone", "+7-916-111-11-11")
+    table.set(0, "birth_date", "1900-01-01")
+    table.set(0, "document_type", PASSPORT_TYPE)
+    patient = table[0]
+    assert patient.phone == "89161111111", "Phone was not updated"
+    assert patient.birth_date == datetime(1900, 1, 1), "Birth date was not updated"
+    assert patient.document_type == PASSPORT_TYPE, "Document type was not updated"